@@ -0,0 +1,140 @@
+"""Module to evaluate expression trees on NumPy arrays."""
+import numpy as np
+
+import Node
+import Value
+
+# NumPy ufuncs corresponding to the operator symbols
+UFUNCS = {
+    "^": np.power,
+    "*": np.multiply,
+    "/": np.true_divide,
+    "%": np.mod,
+    "+": np.add,
+    "-": np.subtract,
+    "sin": np.sin,
+    "cos": np.cos,
+    "exp": np.exp
+}
+
+
+def evaluate_array(root_node, variables, out=None, chunk_size=None,
+                   dtype=np.float64):
+    """
+    Evaluate the tree element-wise on the given arrays.
+
+    variables:  dictionary mapping every variable to a scalar or an array,
+                all arrays have to be broadcastable to a common shape
+    out:        optional array to store the result in, it has to have the
+                common shape of all variables
+    chunk_size: number of elements along the first axis which are evaluated
+                at once, use it to limit the size of the intermediate arrays
+                (e.g. if the inputs are memory mapped files)
+    dtype:      data type used for all computations
+
+    The intermediate results are written into a small number of scratch
+    arrays which are allocated once and reused for every operator and
+    every chunk.
+    """
+    if variables is None:
+        variables = {}
+    shape = np.broadcast_shapes(*(
+        np.shape(variables[name]) for name in Node.variable_names(root_node)))
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError(
+            "The output array has to have the shape " + str(shape) + ".")
+
+    if out.ndim == 0:
+        evaluate_chunk(root_node, variables, out, [], dtype)
+        return out
+
+    length = shape[0]
+    if chunk_size is None or chunk_size > length:
+        chunk_size = max(length, 1)
+    # scratch arrays, created on first use and shared by all chunks
+    buffers = []
+    for start in range(0, length, chunk_size):
+        stop = min(start + chunk_size, length)
+        chunk_variables = {}
+        for name, value in variables.items():
+            if np.ndim(value) == len(shape) and np.shape(value)[0] != 1:
+                chunk_variables[name] = value[start:stop]
+            else:
+                # value is broadcast along the first axis
+                chunk_variables[name] = value
+        evaluate_chunk(
+            root_node, chunk_variables, out[start:stop], buffers, dtype)
+    return out
+
+
+def evaluate_chunk(root_node, variables, target, buffers, dtype):
+    """Evaluate the tree on one chunk and store the result in target."""
+    if isinstance(root_node, Value.Value):
+        target[...] = operand(root_node, variables)
+    else:
+        evaluate_node(root_node, variables, target, buffers, 0, dtype)
+
+
+def operand(leaf, variables):
+    """Return the value of a constant or a variable."""
+    if isinstance(leaf, Value.Constant):
+        return leaf.value
+    return variables[str(leaf)]
+
+
+def scratch_buffer(buffers, level, target, dtype):
+    """Return the scratch array of the given level fitting to target."""
+    if level == len(buffers):
+        buffers.append(np.empty(target.shape, dtype=dtype))
+    buffer = buffers[level]
+    if buffer.shape != target.shape:
+        if buffer.shape[1:] == target.shape[1:] \
+                and buffer.shape[0] >= target.shape[0]:
+            # the last chunk may be smaller than the others
+            return buffer[:target.shape[0]]
+        buffer = np.empty(target.shape, dtype=dtype)
+        buffers[level] = buffer
+    return buffer
+
+
+def evaluate_node(node, variables, target, buffers, level, dtype):
+    """
+    Evaluate the node and store the result in target.
+
+    The result of a nested left child is computed in target directly, the
+    one of a nested right child in the scratch array of the next level.
+    """
+    ufunc = UFUNCS[str(node.operator)]
+    left_child = node.left_child
+    right_child = node.right_child
+    if node.operator.is_monovalent:
+        if isinstance(left_child, Value.Value):
+            ufunc(operand(left_child, variables), out=target, dtype=dtype)
+        else:
+            evaluate_node(left_child, variables, target, buffers, level,
+                          dtype)
+            ufunc(target, out=target, dtype=dtype)
+        return
+
+    if isinstance(left_child, Value.Value):
+        left = operand(left_child, variables)
+        if isinstance(right_child, Value.Value):
+            right = operand(right_child, variables)
+        else:
+            # target is not needed for the left child, therefore use it
+            # for the right one
+            evaluate_node(right_child, variables, target, buffers, level,
+                          dtype)
+            right = target
+    else:
+        evaluate_node(left_child, variables, target, buffers, level, dtype)
+        left = target
+        if isinstance(right_child, Value.Value):
+            right = operand(right_child, variables)
+        else:
+            right = scratch_buffer(buffers, level, target, dtype)
+            evaluate_node(right_child, variables, right, buffers, level + 1,
+                          dtype)
+    ufunc(left, right, out=target, dtype=dtype)
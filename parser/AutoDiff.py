@@ -0,0 +1,281 @@
+"""Module to differentiate expression trees automatically."""
+from math import cos, exp, floor, log, sin
+
+import Node
+import Value
+
+# up to this number of variables the forward mode is used by default
+FORWARD_MODE_LIMIT = 4
+
+
+def gradient(root_node, variables, mode=None):
+    """
+    Return the value of the tree and its gradient in a single pass.
+
+    The gradient is a dictionary mapping every variable of the tree to the
+    partial derivative with respect to it.
+
+    mode:   "forward" (dual numbers, one pass carrying all partial
+            derivatives), "reverse" (one pass to compute the values and
+            one to propagate the derivatives back, independent of the
+            number of variables) or None to choose the forward mode for
+            at most FORWARD_MODE_LIMIT variables
+    """
+    ordered_nodes, variable_names = Node.topological_order(root_node)
+    if mode is None:
+        if len(variable_names) <= FORWARD_MODE_LIMIT:
+            mode = "forward"
+        else:
+            mode = "reverse"
+    if mode == "forward":
+        return forward_gradient(
+            root_node, ordered_nodes, variable_names, variables)
+    elif mode == "reverse":
+        return reverse_gradient(
+            root_node, ordered_nodes, variable_names, variables)
+    raise ValueError("Unknown mode " + str(mode) + ".")
+
+
+def exponent_logarithm(base, exponent):
+    """
+    Return ln(base) for the derivative of base^exponent.
+
+    Raise a ValueError if the logarithm is not defined and needed.
+    """
+    if base > 0:
+        return log(base)
+    if base == 0 and exponent > 0:
+        # 0^y is 0 for all y near the exponent
+        return 0
+    raise ValueError(
+        "The derivative of x^y with respect to y contains ln(x), which is "
+        "not defined for x = " + str(base) + ".")
+
+
+class Dual:
+    """
+    Class representing a dual number.
+
+    Stores a value and its partial derivatives with respect to all
+    variables as tuple.
+    """
+
+    __slots__ = ("value", "derivatives")
+
+    def __init__(self, value, derivatives):
+        """Create a dual number of the given value and derivatives."""
+        self.value = value
+        self.derivatives = derivatives
+
+    def __add__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.value + other.value, tuple(
+                a + b for a, b in zip(self.derivatives, other.derivatives)))
+        return Dual(self.value + other, self.derivatives)
+
+    def __radd__(self, other):
+        return Dual(other + self.value, self.derivatives)
+
+    def __sub__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.value - other.value, tuple(
+                a - b for a, b in zip(self.derivatives, other.derivatives)))
+        return Dual(self.value - other, self.derivatives)
+
+    def __rsub__(self, other):
+        return Dual(other - self.value, tuple(-a for a in self.derivatives))
+
+    def __mul__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.value * other.value, tuple(
+                a * other.value + self.value * b
+                for a, b in zip(self.derivatives, other.derivatives)))
+        return Dual(self.value * other, tuple(
+            a * other for a in self.derivatives))
+
+    def __rmul__(self, other):
+        return self * other
+
+    def __truediv__(self, other):
+        if isinstance(other, Dual):
+            square = other.value * other.value
+            return Dual(self.value / other.value, tuple(
+                (a * other.value - self.value * b) / square
+                for a, b in zip(self.derivatives, other.derivatives)))
+        return Dual(self.value / other, tuple(
+            a / other for a in self.derivatives))
+
+    def __rtruediv__(self, other):
+        factor = -other / (self.value * self.value)
+        return Dual(other / self.value, tuple(
+            factor * a for a in self.derivatives))
+
+    def __mod__(self, other):
+        if isinstance(other, Dual):
+            # x % y = x - y*floor(x/y)
+            quotient = floor(self.value / other.value)
+            return Dual(self.value % other.value, tuple(
+                a - quotient * b
+                for a, b in zip(self.derivatives, other.derivatives)))
+        return Dual(self.value % other, self.derivatives)
+
+    def __rmod__(self, other):
+        quotient = floor(other / self.value)
+        return Dual(other % self.value, tuple(
+            -quotient * a for a in self.derivatives))
+
+    def __pow__(self, other):
+        if isinstance(other, Dual):
+            value = self.value ** other.value
+            if any(other.derivatives):
+                logarithm = exponent_logarithm(self.value, other.value)
+            else:
+                logarithm = 0
+            factor = other.value * self.value ** (other.value - 1)
+            return Dual(value, tuple(
+                factor * a + value * logarithm * b
+                for a, b in zip(self.derivatives, other.derivatives)))
+        factor = other * self.value ** (other - 1)
+        return Dual(self.value ** other, tuple(
+            factor * a for a in self.derivatives))
+
+    def __rpow__(self, other):
+        value = other ** self.value
+        factor = value * exponent_logarithm(other, self.value)
+        return Dual(value, tuple(factor * a for a in self.derivatives))
+
+
+# functions of the monovalent operators applied to dual numbers
+DUAL_FUNCTIONS = {
+    "sin": lambda x: Dual(
+        sin(x.value), tuple(cos(x.value) * a for a in x.derivatives)),
+    "cos": lambda x: Dual(
+        cos(x.value), tuple(-sin(x.value) * a for a in x.derivatives)),
+    "exp": lambda x: Dual(
+        exp(x.value), tuple(exp(x.value) * a for a in x.derivatives))
+}
+
+
+def forward_gradient(root_node, ordered_nodes, variable_names, variables):
+    """Compute value and gradient using dual numbers."""
+    number_of_variables = len(variable_names)
+    seeds = {}
+    for index, name in enumerate(variable_names):
+        derivatives = [0] * number_of_variables
+        derivatives[index] = 1
+        seeds[name] = Dual(variables[name], tuple(derivatives))
+
+    results = {}
+    for node in ordered_nodes:
+        if isinstance(node, Value.Constant):
+            result = node.value
+        elif isinstance(node, Value.Variable):
+            result = seeds[str(node)]
+        else:
+            left = results[id(node.left_child)]
+            if node.operator.is_monovalent:
+                if isinstance(left, Dual):
+                    result = DUAL_FUNCTIONS[str(node.operator)](left)
+                else:
+                    result = node.operator.function(left)
+            else:
+                right = results[id(node.right_child)]
+                # the operator functions of + - * / % ^ call the methods
+                # of Dual if one of the arguments is a dual number
+                result = node.operator.function(left, right)
+        results[id(node)] = result
+
+    result = results[id(root_node)]
+    if not isinstance(result, Dual):
+        return result, {name: 0 for name in variable_names}
+    return result.value, dict(zip(variable_names, result.derivatives))
+
+
+def reverse_gradient(root_node, ordered_nodes, variable_names, variables):
+    """Compute value and gradient by backpropagation."""
+    # compute all values and remember which subtrees contain variables
+    values = {}
+    depends_on_variables = set()
+    for node in ordered_nodes:
+        if isinstance(node, Value.Constant):
+            values[id(node)] = node.value
+            continue
+        if isinstance(node, Value.Variable):
+            values[id(node)] = variables[str(node)]
+            depends_on_variables.add(id(node))
+            continue
+        left_child = node.left_child
+        right_child = node.right_child
+        if node.operator.is_monovalent:
+            values[id(node)] = node.operator.function(values[id(left_child)])
+        else:
+            values[id(node)] = node.operator.function(
+                values[id(left_child)], values[id(right_child)])
+        if id(left_child) in depends_on_variables \
+                or id(right_child) in depends_on_variables:
+            depends_on_variables.add(id(node))
+
+    # propagate the derivative of the root back to the variables, the
+    # reversed post-order guarantees that all parents of a node are
+    # processed before the node itself
+    adjoints = {id(root_node): 1}
+    gradient = {name: 0 for name in variable_names}
+    for node in reversed(ordered_nodes):
+        if id(node) not in depends_on_variables:
+            continue
+        adjoint = adjoints.get(id(node), 0)
+        if isinstance(node, Value.Variable):
+            gradient[str(node)] += adjoint
+            continue
+        symbol = str(node.operator)
+        left_child = node.left_child
+        right_child = node.right_child
+        a = values[id(left_child)]
+        if node.operator.is_monovalent:
+            if symbol == "sin":
+                partial = cos(a)
+            elif symbol == "cos":
+                partial = -sin(a)
+            elif symbol == "exp":
+                partial = values[id(node)]
+            else:
+                raise ValueError(
+                    "The derivative of " + symbol + " is unknown.")
+            adjoints[id(left_child)] = \
+                adjoints.get(id(left_child), 0) + adjoint * partial
+            continue
+
+        b = values[id(right_child)]
+        if id(left_child) in depends_on_variables:
+            if symbol == "+" or symbol == "-" or symbol == "%":
+                partial = 1
+            elif symbol == "*":
+                partial = b
+            elif symbol == "/":
+                partial = 1 / b
+            elif symbol == "^":
+                partial = b * a ** (b - 1)
+            else:
+                raise ValueError(
+                    "The derivative of " + symbol + " is unknown.")
+            adjoints[id(left_child)] = \
+                adjoints.get(id(left_child), 0) + adjoint * partial
+        if id(right_child) in depends_on_variables:
+            if symbol == "+":
+                partial = 1
+            elif symbol == "-":
+                partial = -1
+            elif symbol == "*":
+                partial = a
+            elif symbol == "/":
+                partial = -a / (b * b)
+            elif symbol == "^":
+                partial = values[id(node)] * exponent_logarithm(a, b)
+            elif symbol == "%":
+                partial = -floor(a / b)
+            else:
+                raise ValueError(
+                    "The derivative of " + symbol + " is unknown.")
+            adjoints[id(right_child)] = \
+                adjoints.get(id(right_child), 0) + adjoint * partial
+    return values[id(root_node)], gradient
@@ -0,0 +1,387 @@
+"""Module to benchmark the parser."""
+import argparse
+import json
+import math
+import random
+import string
+import time
+import timeit
+import tracemalloc
+
+import Expression
+import Node
+import Value
+
+
+class LegacyOperator:
+    """Operator as stored before, i.e. one instance per token."""
+
+    def __init__(self, operator_symbol, function, is_monovalent):
+        self.operator_symbol = operator_symbol
+        self.function = function
+        self.is_monovalent = is_monovalent
+
+
+class LegacyNode:
+    """Node storing its attributes in a dictionary as before."""
+
+    def __init__(self, operator, left_child, right_child=None):
+        self.operator = operator
+        self.left_child = left_child
+        self.right_child = right_child
+
+
+class LegacyValue:
+    """Constant or variable storing its value in a dictionary as before."""
+
+    def __init__(self, value):
+        self.value = value
+
+
+def count_nodes(root_node):
+    """Return the number of nodes and leaves of the tree."""
+    number_of_nodes = 0
+    pending = [root_node]
+    while pending:
+        node = pending.pop()
+        number_of_nodes += 1
+        if not isinstance(node, Value.Value):
+            pending.append(node.left_child)
+            if node.right_child is not None:
+                pending.append(node.right_child)
+    return number_of_nodes
+
+
+def convert_to_legacy_tree(root_node):
+    """Return a copy of the tree using the previous representation."""
+    converted = {}
+    for node in Node.topological_order(root_node)[0]:
+        if isinstance(node, Value.Value):
+            # every variable name used to be a separate string
+            converted[id(node)] = LegacyValue(
+                "".join(list(node.value))
+                if isinstance(node, Value.Variable) else node.value)
+        else:
+            operator = LegacyOperator(
+                node.operator.operator_symbol,
+                node.operator.function,
+                node.operator.is_monovalent)
+            right_child = None
+            if node.right_child is not None:
+                right_child = converted[id(node.right_child)]
+            converted[id(node)] = LegacyNode(
+                operator, converted[id(node.left_child)], right_child)
+    return converted[id(root_node)]
+
+
+def measure_memory(function, *arguments):
+    """Return the result of the function and the memory it still uses."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = function(*arguments)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, after - before
+
+
+def create_tree(number_of_terms):
+    """Return the tree of a sum of the given number of terms."""
+    term = "sin(alpha*beta)-gamma^2"
+    expression = Expression.Expression(" + ".join([term] * number_of_terms))
+    return expression.root_node
+
+
+def benchmark_memory(number_of_nodes=10 ** 5):
+    """
+    Compare the memory per node of the current and the previous tree.
+
+    The tree is a sum of equal terms with at least the given number of
+    nodes (including constants and variables).
+    """
+    # every term consists of 8 nodes plus one node for the addition
+    root_node, tree_bytes = measure_memory(
+        create_tree, -(-number_of_nodes // 9))
+    nodes = count_nodes(root_node)
+    _, legacy_bytes = measure_memory(convert_to_legacy_tree, root_node)
+    return {
+        "benchmark": "memory",
+        "nodes": nodes,
+        "bytes_per_node_before": legacy_bytes / nodes,
+        "bytes_per_node_after": tree_bytes / nodes
+    }
+
+
+def variable_name(index):
+    """Return a unique variable name (letters only) for the given index."""
+    name = ""
+    while True:
+        index, remainder = divmod(index, len(string.ascii_lowercase))
+        name = string.ascii_lowercase[remainder] + name
+        if index == 0:
+            # prefix all names to avoid operator names like "exp"
+            return "v" + name
+
+
+def time_per_call(function, repetitions):
+    """Return the best measured time of a single call of the function."""
+    return min(timeit.repeat(function, number=repetitions, repeat=5)) \
+        / repetitions
+
+
+def finite_difference_gradient(expression, variables, step=1e-6):
+    """Approximate the gradient by central differences."""
+    gradient = {}
+    for name, value in variables.items():
+        variables_plus = dict(variables)
+        variables_plus[name] = value + step
+        variables_minus = dict(variables)
+        variables_minus[name] = value - step
+        gradient[name] = (expression.evaluate(variables_plus)
+                          - expression.evaluate(variables_minus)) / (2 * step)
+    return expression.evaluate(variables), gradient
+
+
+def benchmark_gradient(numbers_of_variables=(2, 20), repetitions=100):
+    """
+    Compare automatic differentiation with finite differences.
+
+    The expression of n variables v_i is the sum of the terms
+    sin(v_i*v_(i+1)) + v_i^2/(1+exp(v_i)).
+    """
+    results = []
+    for number_of_variables in numbers_of_variables:
+        names = [variable_name(i) for i in range(number_of_variables)]
+        terms = []
+        for i, name in enumerate(names):
+            following_name = names[(i + 1) % number_of_variables]
+            terms.append("sin(" + name + "*" + following_name + ") + "
+                         + name + "^2/(1+exp(" + name + "))")
+        expression = Expression.Expression(" + ".join(terms))
+        variables = {name: 0.5 + 0.01 * i for i, name in enumerate(names)}
+        result = {"benchmark": "gradient", "variables": number_of_variables}
+        for mode in ("forward", "reverse"):
+            result["seconds_" + mode] = time_per_call(
+                lambda: expression.gradient(variables, mode), repetitions)
+        result["seconds_finite_differences"] = time_per_call(
+            lambda: finite_difference_gradient(expression, variables),
+            repetitions)
+        results.append(result)
+    return results
+
+
+def subtree_capacity(depth):
+    """Return the maximal number of nodes of a tree of the given depth."""
+    if depth is None:
+        return float("inf")
+    return 2 ** depth - 1
+
+
+def random_expression(number_of_nodes, number_of_variables,
+                      maximum_depth=None, random_generator=random):
+    """
+    Return a random expression with the given number of tree nodes.
+
+    Only +, -, *, sin and cos are used, so every expression can be
+    evaluated for all variables without errors. Leaves are variables or
+    positive constants, maximum_depth limits the depth of the tree.
+    """
+    if number_of_nodes > subtree_capacity(maximum_depth):
+        raise ValueError("The nodes do not fit into a tree of this depth.")
+    if maximum_depth is not None:
+        maximum_depth -= 1
+    if number_of_nodes == 1:
+        if random_generator.random() < 0.7:
+            return variable_name(
+                random_generator.randrange(number_of_variables))
+        return str(random_generator.randint(1, 9))
+    capacity = subtree_capacity(maximum_depth)
+    # range of possible sizes of the left subtree of a bivalent operator
+    smallest_left_size = max(1, number_of_nodes - 1 - capacity)
+    largest_left_size = min(number_of_nodes - 2, capacity)
+    if smallest_left_size > largest_left_size \
+            or (number_of_nodes - 1 <= capacity
+                and random_generator.random() < 0.1):
+        operand = random_expression(
+            number_of_nodes - 1, number_of_variables, maximum_depth,
+            random_generator)
+        return random_generator.choice(["sin", "cos"]) + "(" + operand + ")"
+    left_size = random_generator.randint(
+        smallest_left_size, largest_left_size)
+    left = random_expression(
+        left_size, number_of_variables, maximum_depth, random_generator)
+    right = random_expression(
+        number_of_nodes - 1 - left_size, number_of_variables, maximum_depth,
+        random_generator)
+    return "(" + left + random_generator.choice("+-*") + right + ")"
+
+
+def benchmark_function(sizes=(10, 100, 1000), number_of_variables=5,
+                       repetitions=1000):
+    """
+    Compare the generated functions with the other evaluation methods.
+
+    Node.evaluate (recursion over the tree), Expression.compile (nested
+    closures) and Expression.to_function (generated Python code) are
+    measured on random expressions of the given numbers of nodes.
+    """
+    random_generator = random.Random(0)
+    results = []
+    for size in sizes:
+        expression = Expression.Expression(random_expression(
+            size, number_of_variables, random_generator=random_generator))
+        names = sorted(Node.variable_names(expression.root_node))
+        variables = {name: random_generator.random() for name in names}
+        arguments = [variables[name] for name in names]
+        compiled_function = expression.compile()
+        generated_function = expression.to_function(names)
+        results.append({
+            "benchmark": "function",
+            "nodes": count_nodes(expression.root_node),
+            "seconds_evaluate": time_per_call(
+                lambda: expression.evaluate(variables), repetitions),
+            "seconds_compile": time_per_call(
+                lambda: compiled_function(variables), repetitions),
+            "seconds_to_function": time_per_call(
+                lambda: generated_function(*arguments), repetitions)
+        })
+    return results
+
+
+def percentiles(samples, fractions=(0.5, 0.9, 0.99)):
+    """Return a dictionary of the given percentiles of the samples."""
+    samples = sorted(samples)
+    result = {}
+    for fraction in fractions:
+        # nearest rank method
+        rank = max(1, math.ceil(fraction * len(samples)))
+        result["p" + str(round(fraction * 100))] = samples[rank - 1]
+    result["max"] = samples[-1]
+    return result
+
+
+def unparsed_expression(mathematical_expression):
+    """Return an expression which is neither tokenized nor parsed yet."""
+    expression = Expression.Expression.__new__(Expression.Expression)
+    expression.operator_priority = Expression.OPERATOR_PRIORITY
+    expression.operator_list = list(expression.operator_priority.keys())
+    expression.mathematical_expression = expression.delete_white_spaces(
+        mathematical_expression)
+    expression.mathematical_expression_length = len(
+        expression.mathematical_expression)
+    return expression
+
+
+def parse_and_evaluate(mathematical_expression, variables):
+    """Tokenize, parse and evaluate the expression once."""
+    expression = unparsed_expression(mathematical_expression)
+    root_node = expression.create_tree(expression.tokenize_expression())
+    return root_node.evaluate(variables)
+
+
+def benchmark_throughput(sizes=(10, 100, 1000), depths=(None,),
+                         numbers_of_variables=(5,), samples=200, seed=0):
+    """
+    Measure the single phases of the parser on random workloads.
+
+    For every combination of size (number of tree nodes), maximum depth
+    and number of variables, samples random expressions are generated.
+    Tokenizing, building the tree and evaluating it are timed separately
+    per expression and reported as percentiles in seconds, together with
+    the throughput of the whole pipeline and its peak memory.
+    """
+    random_generator = random.Random(seed)
+    results = []
+    for size in sizes:
+        for depth in depths:
+            if size > subtree_capacity(depth):
+                continue
+            for number_of_variables in numbers_of_variables:
+                workload = [random_expression(
+                    size, number_of_variables, depth, random_generator)
+                    for _ in range(samples)]
+                variables = {variable_name(i): random_generator.random()
+                             for i in range(number_of_variables)}
+                times = {"tokenize": [], "create_tree": [], "evaluate": []}
+                for mathematical_expression in workload:
+                    expression = unparsed_expression(mathematical_expression)
+                    start = time.perf_counter()
+                    token_list = expression.tokenize_expression()
+                    tokenized = time.perf_counter()
+                    root_node = expression.create_tree(token_list)
+                    created = time.perf_counter()
+                    root_node.evaluate(variables)
+                    evaluated = time.perf_counter()
+                    times["tokenize"].append(tokenized - start)
+                    times["create_tree"].append(created - tokenized)
+                    times["evaluate"].append(evaluated - created)
+
+                # peak memory of the largest expression, measured separately
+                # because tracing slows down the timed runs
+                largest = max(workload, key=len)
+                tracemalloc.start()
+                try:
+                    parse_and_evaluate(largest, variables)
+                    peak_bytes = tracemalloc.get_traced_memory()[1]
+                finally:
+                    tracemalloc.stop()
+
+                total_seconds = sum(sum(phase) for phase in times.values())
+                result = {
+                    "benchmark": "throughput",
+                    "nodes": size,
+                    "maximum_depth": depth,
+                    "variables": number_of_variables,
+                    "samples": samples,
+                    "characters": sum(map(len, workload)) // samples,
+                    "expressions_per_second": samples / total_seconds,
+                    "peak_bytes": peak_bytes
+                }
+                for phase, phase_times in times.items():
+                    result["seconds_" + phase] = percentiles(phase_times)
+                results.append(result)
+    return results
+
+
+def optional_depth(text):
+    """Convert a command line depth, where "none" means unlimited."""
+    return None if text.lower() == "none" else int(text)
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(
+        description="Benchmark the parser and print the results as JSON.")
+    argument_parser.add_argument(
+        "benchmark",
+        choices=["memory", "gradient", "function", "throughput"])
+    argument_parser.add_argument(
+        "--nodes", type=int, default=10 ** 5,
+        help="number of nodes of the benchmarked trees")
+    argument_parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10, 100, 1000],
+        help="numbers of nodes of the random expressions (throughput)")
+    argument_parser.add_argument(
+        "--depths", type=optional_depth, nargs="+", default=[None],
+        help="maximum depths of the random expressions, none for "
+             "unlimited (throughput)")
+    argument_parser.add_argument(
+        "--variables", type=int, nargs="+", default=[5],
+        help="numbers of variables of the random expressions (throughput)")
+    argument_parser.add_argument(
+        "--samples", type=int, default=200,
+        help="number of random expressions per workload (throughput)")
+    argument_parser.add_argument(
+        "--seed", type=int, default=0,
+        help="seed of the random workloads (throughput)")
+    arguments = argument_parser.parse_args()
+    if arguments.benchmark == "memory":
+        print(json.dumps(benchmark_memory(arguments.nodes), indent=4))
+    elif arguments.benchmark == "gradient":
+        print(json.dumps(benchmark_gradient(), indent=4))
+    elif arguments.benchmark == "function":
+        print(json.dumps(benchmark_function(), indent=4))
+    elif arguments.benchmark == "throughput":
+        print(json.dumps(benchmark_throughput(
+            arguments.sizes, arguments.depths, arguments.variables,
+            arguments.samples, arguments.seed), indent=4))
@@ -0,0 +1,126 @@
+"""Module to generate Python functions out of expression trees."""
+import math
+
+import Node
+import Operator
+import Value
+
+# Python operators of the bivalent operator symbols
+PYTHON_OPERATORS = {
+    "^": "**",
+    "*": "*",
+    "/": "/",
+    "%": "%",
+    "+": "+",
+    "-": "-"
+}
+
+# nested expressions deeper than this are assigned to a temporary
+# variable, because the Python compiler limits the nesting depth
+MAXIMUM_NESTING_DEPTH = 50
+
+
+def generate_function(root_node, argument_names):
+    """
+    Return a Python function evaluating the tree.
+
+    The function takes the values of the variables as positional arguments
+    in the order of argument_names. Its source code is generated once and
+    compiled by Python, so an evaluation does not need any closure or
+    method call except for sin, cos and exp.
+    """
+    source, namespace = generate_source(root_node, argument_names)
+    exec(compile(source, "<expression>", "exec"), namespace)
+    function = namespace["generated_function"]
+    function.source = source
+    return function
+
+
+def generate_source(root_node, argument_names):
+    """
+    Return the source code of the function and its global namespace.
+
+    The namespace contains all functions and constants which can not be
+    written as Python literals.
+    """
+    arguments = {}
+    for index, name in enumerate(argument_names):
+        # the variable names could be Python keywords, e.g. "if"
+        arguments[name] = "a" + str(index)
+    namespace = {}
+    # names in the namespace of all functions and constants
+    global_names = {}
+    ordered_nodes = Node.topological_order(root_node)[0]
+    # count the parents of every node to find shared subtrees
+    references = {}
+    for node in ordered_nodes:
+        if not isinstance(node, Value.Value):
+            for child in (node.left_child, node.right_child):
+                references[id(child)] = references.get(id(child), 0) + 1
+
+    lines = []
+    # dictionary mapping the id of every generated node to its code and
+    # its nesting depth
+    generated = {}
+    for node in ordered_nodes:
+        if isinstance(node, Value.Value):
+            generated[id(node)] = (
+                leaf_code(node, arguments, namespace, global_names), 0)
+            continue
+
+        left_code, left_depth = generated[id(node.left_child)]
+        symbol = str(node.operator)
+        if node.operator.is_monovalent:
+            function_name = global_name(
+                node.operator.function, "f", namespace, global_names)
+            code = function_name + "(" + left_code + ")"
+            depth = left_depth + 1
+        else:
+            right_code, right_depth = generated[id(node.right_child)]
+            if Operator.create_operator(symbol) is node.operator:
+                code = "(" + left_code + " " + PYTHON_OPERATORS[symbol] \
+                    + " " + right_code + ")"
+            else:
+                function_name = global_name(
+                    node.operator.function, "f", namespace, global_names)
+                code = function_name + "(" + left_code + ", " \
+                    + right_code + ")"
+            depth = max(left_depth, right_depth) + 1
+        if references.get(id(node), 0) > 1 \
+                or depth > MAXIMUM_NESTING_DEPTH:
+            # compute shared or deeply nested subtrees in a separate line
+            temporary_name = "t" + str(len(lines))
+            lines.append("    " + temporary_name + " = " + code)
+            code = temporary_name
+            depth = 0
+        generated[id(node)] = (code, depth)
+
+    header = "def generated_function(" + ", ".join(arguments.values()) + "):"
+    lines.append("    return " + generated[id(root_node)][0])
+    return "\n".join([header] + lines) + "\n", namespace
+
+
+def leaf_code(node, arguments, namespace, global_names):
+    """Return the code of a constant or a variable."""
+    if isinstance(node, Value.Variable):
+        name = str(node)
+        if name not in arguments:
+            raise ValueError(
+                "The variable " + name + " is not an argument.")
+        return arguments[name]
+    value = node.value
+    if type(value) is int or (type(value) is float and math.isfinite(value)):
+        if repr(value).startswith("-"):
+            return "(" + repr(value) + ")"
+        return repr(value)
+    return global_name(value, "c", namespace, global_names)
+
+
+def global_name(value, prefix, namespace, global_names):
+    """Return the name of the value in the namespace of the function."""
+    key = (type(value), repr(value)) if prefix == "c" else id(value)
+    if key not in global_names:
+        name = prefix + str(len(global_names))
+        global_names[key] = name
+        namespace[name] = value
+    return global_names[key]
@@ -0,0 +1,177 @@
+"""Module to compile expression trees to nested closures."""
+from operator import itemgetter
+
+import Node
+import Value
+
+# chains of nested closures deeper than this are split by computing the
+# subtree in a separate step, because every nested closure needs a frame
+# of the Python stack when it is called
+MAXIMUM_NESTING_DEPTH = 50
+
+
+def compile_tree(root_node):
+    """
+    Compile the given tree into a single function.
+
+    The returned function takes the same variables dictionary as
+    Node.evaluate, but the decision which kind of child (constant,
+    variable or nested expression) has to be handled is made only once
+    while compiling. Every variable is assigned a fixed slot, so an
+    evaluation just copies the variable values into a list and calls
+    one closure per operator. Subtrees which are shared by several nodes
+    (see Optimizer) are evaluated only once.
+    """
+    variable_names, steps, bodies = compile_program([root_node])
+    body = bodies[0]
+    if not steps:
+        def evaluate(variables=None):
+            return body([variables[name] for name in variable_names])
+    else:
+        def evaluate(variables=None):
+            slots = [variables[name] for name in variable_names]
+            for step in steps:
+                slots.append(step(slots))
+            return body(slots)
+    return evaluate
+
+
+def compile_trees(root_nodes):
+    """
+    Compile several trees into a single function.
+
+    The returned function takes a variables dictionary and returns the
+    list of the values of all trees. Subtrees shared by the trees are
+    evaluated only once.
+    """
+    variable_names, steps, bodies = compile_program(root_nodes)
+
+    def evaluate(variables=None):
+        slots = [variables[name] for name in variable_names]
+        for step in steps:
+            slots.append(step(slots))
+        return [body(slots) for body in bodies]
+
+    return evaluate
+
+
+def compile_program(root_nodes):
+    """
+    Compile the given trees.
+
+    Return the list of variable names (the index of a name is its slot),
+    the list of closures computing the shared subtrees in order (their
+    results are appended to the slots) and one closure per tree.
+    """
+    ordered_nodes, variable_names = Node.topological_order(*root_nodes)
+    variable_slots = {name: index for index, name in enumerate(variable_names)}
+    # count the parents of every node to find shared subtrees, every tree
+    # counts as parent of its root
+    references = {}
+    for root_node in root_nodes:
+        references[id(root_node)] = references.get(id(root_node), 0) + 1
+    for node in ordered_nodes:
+        if not isinstance(node, Value.Value):
+            for child in (node.left_child, node.right_child):
+                references[id(child)] = references.get(id(child), 0) + 1
+
+    node_slots = {}
+    steps = []
+    # closure and nesting depth of every node which is not computed in a
+    # separate step, built in post-order, so the closures of the children
+    # always exist
+    closures = {}
+    for node in ordered_nodes:
+        if isinstance(node, Value.Value):
+            continue
+        closure, depth = compile_node(
+            node, variable_slots, node_slots, closures)
+        if references[id(node)] > 1 or depth > MAXIMUM_NESTING_DEPTH:
+            steps.append(closure)
+            node_slots[id(node)] = len(variable_slots) + len(node_slots)
+        else:
+            closures[id(node)] = (closure, depth)
+    bodies = [compile_operand(root_node, variable_slots, node_slots, closures)
+              for root_node in root_nodes]
+    return list(variable_slots), steps, bodies
+
+
+def slot_of(node, variable_slots, node_slots):
+    """Return the slot of a variable or a shared subtree, otherwise None."""
+    if isinstance(node, Value.Variable):
+        return variable_slots[str(node)]
+    return node_slots.get(id(node))
+
+
+def compile_operand(node, variable_slots, node_slots, closures):
+    """Return a closure evaluating a constant, a variable or a subtree."""
+    if isinstance(node, Value.Constant):
+        value = node.value
+        return lambda slots: value
+    index = slot_of(node, variable_slots, node_slots)
+    if index is not None:
+        return itemgetter(index)
+    return closures[id(node)][0]
+
+
+def compile_node(node, variable_slots, node_slots, closures):
+    """
+    Return a closure evaluating the given node on a list of slots.
+
+    The closures of nested children which are not computed in a separate
+    step are taken from closures. The nesting depth of the returned
+    closure is returned as well.
+    """
+    function = node.operator.function
+    left_child = node.left_child
+    right_child = node.right_child
+    if node.operator.is_monovalent:
+        if isinstance(left_child, Value.Constant):
+            value = left_child.value
+            return lambda slots: function(value), 1
+        index = slot_of(left_child, variable_slots, node_slots)
+        if index is not None:
+            return lambda slots: function(slots[index]), 1
+        left, left_depth = closures[id(left_child)]
+        return lambda slots: function(left(slots)), left_depth + 1
+
+    # operator is bivalent, therefore specialize the closure on the kind
+    # of both children
+    right_index = slot_of(right_child, variable_slots, node_slots)
+    if isinstance(left_child, Value.Constant):
+        left_value = left_child.value
+        if isinstance(right_child, Value.Constant):
+            right_value = right_child.value
+            return lambda slots: function(left_value, right_value), 1
+        elif right_index is not None:
+            return lambda slots: function(left_value, slots[right_index]), 1
+        else:
+            right, right_depth = closures[id(right_child)]
+            return lambda slots: function(left_value, right(slots)), \
+                right_depth + 1
+
+    left_index = slot_of(left_child, variable_slots, node_slots)
+    if left_index is not None:
+        if isinstance(right_child, Value.Constant):
+            right_value = right_child.value
+            return lambda slots: function(slots[left_index], right_value), 1
+        elif right_index is not None:
+            return lambda slots: function(
+                slots[left_index], slots[right_index]), 1
+        else:
+            right, right_depth = closures[id(right_child)]
+            return lambda slots: function(slots[left_index], right(slots)), \
+                right_depth + 1
+    else:
+        left, left_depth = closures[id(left_child)]
+        if isinstance(right_child, Value.Constant):
+            right_value = right_child.value
+            return lambda slots: function(left(slots), right_value), \
+                left_depth + 1
+        elif right_index is not None:
+            return lambda slots: function(left(slots), slots[right_index]), \
+                left_depth + 1
+        else:
+            right, right_depth = closures[id(right_child)]
+            return lambda slots: function(left(slots), right(slots)), \
+                max(left_depth, right_depth) + 1
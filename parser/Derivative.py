@@ -0,0 +1,154 @@
+"""Module to compute symbolic derivatives of expression trees."""
+from math import log
+
+import Node
+import Operator
+import Optimizer
+import Value
+
+
+def derivative(root_node, variable_name, optimizer=None):
+    """
+    Return the tree of the derivative with respect to the given variable.
+
+    The derivative is built with the given Optimizer, therefore it is
+    simplified and shares all subtrees with optimizer.optimize(root_node).
+    Raise a ValueError if the derivative can not be expressed by the
+    available operators (e.g. y^x with respect to x, which needs ln(y)).
+    """
+    if optimizer is None:
+        optimizer = Optimizer.Optimizer()
+    builder = DerivativeBuilder(variable_name, optimizer)
+    return builder.build(optimizer.optimize(root_node))
+
+
+class DerivativeBuilder:
+    """
+    Class creating the derivative of a simplified tree.
+
+    Derivatives which are zero for sure are represented by None, so terms
+    like 0*x are never created.
+    """
+
+    def __init__(self, variable_name, optimizer):
+        """Create a builder for derivatives with respect to given variable."""
+        self.variable_name = variable_name
+        self.optimizer = optimizer
+
+    def build(self, root_node):
+        """Return the derivative of a tree created by the optimizer."""
+        # dictionary mapping the id of every visited node to its derivative
+        derivatives = {}
+        for node in Node.topological_order(root_node)[0]:
+            if isinstance(node, Value.Constant):
+                derivatives[id(node)] = None
+            elif isinstance(node, Value.Variable):
+                if str(node) == self.variable_name:
+                    derivatives[id(node)] = self.optimizer.create_constant(1)
+                else:
+                    derivatives[id(node)] = None
+            else:
+                derivatives[id(node)] = self.derive_node(node, derivatives)
+        result = derivatives[id(root_node)]
+        if result is None:
+            return self.optimizer.create_constant(0)
+        return result
+
+    def derive_node(self, node, derivatives):
+        """Return the derivative of a node whose children are derived."""
+        symbol = str(node.operator)
+        u = node.left_child
+        du = derivatives[id(u)]
+        if node.operator.is_monovalent:
+            if du is None:
+                return None
+            if symbol == "sin":
+                return self.multiply(self.create("cos", u), du)
+            elif symbol == "cos":
+                return self.multiply(self.negate(self.create("sin", u)), du)
+            elif symbol == "exp":
+                # the derivative contains the node itself
+                return self.multiply(node, du)
+            raise ValueError(
+                "The derivative of " + symbol + " is unknown.")
+
+        v = node.right_child
+        dv = derivatives[id(v)]
+        if du is None and dv is None:
+            return None
+        if symbol == "+":
+            return self.add(du, dv)
+        elif symbol == "-":
+            return self.subtract(du, dv)
+        elif symbol == "*":
+            return self.add(self.multiply(du, v), self.multiply(u, dv))
+        elif symbol == "/":
+            if dv is None:
+                return self.create("/", du, v)
+            # (du*v - u*dv) / v^2
+            return self.create(
+                "/",
+                self.subtract(self.multiply(du, v), self.multiply(u, dv)),
+                self.create("^", v, self.optimizer.create_constant(2)))
+        elif symbol == "^":
+            if dv is None:
+                # v * u^(v-1) * du
+                exponent = self.create(
+                    "-", v, self.optimizer.create_constant(1))
+                return self.multiply(
+                    self.multiply(v, self.create("^", u, exponent)), du)
+            # u^v * (dv*ln(u) + v*du/u)
+            logarithm = self.logarithm(u)
+            inner = self.multiply(dv, logarithm)
+            if du is not None:
+                inner = self.add(
+                    inner, self.create("/", self.multiply(v, du), u))
+            return self.multiply(node, inner)
+        elif symbol == "%":
+            if dv is None:
+                return du
+            # u % v = u - v*floor(u/v), floor(u/v) = (u - u%v) / v
+            quotient = self.create("/", self.create("-", u, node), v)
+            return self.subtract(du, self.multiply(dv, quotient))
+        raise ValueError("The derivative of " + symbol + " is unknown.")
+
+    def create(self, symbol, left_child, right_child=None):
+        """Return the simplified node of the given operator symbol."""
+        return self.optimizer.create_node(
+            Operator.create_operator(symbol), left_child, right_child)
+
+    def add(self, a, b):
+        """Return a+b, where None represents zero."""
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return self.create("+", a, b)
+
+    def subtract(self, a, b):
+        """Return a-b, where None represents zero."""
+        if b is None:
+            return a
+        if a is None:
+            return self.negate(b)
+        return self.create("-", a, b)
+
+    def multiply(self, a, b):
+        """Return a*b, where None represents zero."""
+        if a is None or b is None:
+            return None
+        return self.create("*", a, b)
+
+    def negate(self, a):
+        """Return -a."""
+        if isinstance(a, Value.Constant):
+            return self.optimizer.create_constant(-a.value)
+        return self.create("-", self.optimizer.create_constant(0), a)
+
+    def logarithm(self, a):
+        """Return ln(a), which only exists for positive constants."""
+        if isinstance(a, Value.Constant) and a.value > 0:
+            return self.optimizer.create_constant(log(a.value))
+        raise ValueError(
+            "The derivative contains ln(" + str(a) + "), which can not be "
+            "expressed by the available operators.")
@@ -1,40 +1,67 @@
 """Module to represent mathematical expressions as a tree."""
-from math import cos, exp, sin
-from sys import maxsize
+import re
+import threading
+from collections import OrderedDict
 
+import ArrayEvaluator
+import AutoDiff
+import CodeGenerator
+import Compiler
+import Derivative
+import IncrementalEvaluator
+import Interval
 import Node
 import Operator
+import Optimizer
+import ParallelEvaluator
 import Value
 
+# define all allowed operators and their corresponding
+# priorities (lowest priority = 0)
+OPERATOR_PRIORITY = {
+    "^": 4,  # power
+    "*": 3,
+    "/": 3,
+    "%": 2,  # modulo
+    "+": 1,
+    "-": 1,
+    "sin": 5,
+    "cos": 5,
+    "exp": 5  # e^(x)
+}
+
+# bivalent operators which are evaluated from right to left
+RIGHT_ASSOCIATIVE_OPERATORS = {"^"}
+
+# priority of a "-" in front of an operand, i.e. -x^2 = -(x^2) but
+# -x*y = (-x)*y
+NEGATION_PRIORITY = 3.5
+
+# marker of an opening bracket on the operator stack of create_tree
+BRACKET = (-1, None, False)
+
+# regular expression matching a single token, i.e. a number (integer or
+# floating point), a name (operator or variable) or any other character
+TOKEN_PATTERN = re.compile(
+    r"((?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)"
+    # operators have to be checked first, e.g. "sinx" is sin(x)
+    + r"|(" + "|".join(
+        symbol for symbol in OPERATOR_PRIORITY if symbol.isalpha())
+    + r"|[^\W\d_]+)"
+    + r"|(.)"
+)
+
 
 class Expression:
     """Class to represent an expression and its corresponding tree."""
 
     def __init__(self, mathematical_expression):
         """Create a tree representation out of given expression."""
-        # define all allowed operators and their corresponding
-        # priorities (lowest priority = 0)
-        self.operator_priority = {
-            "^": 4,  # power
-            "*": 3,
-            "/": 3,
-            "%": 2,  # modulo
-            "+": 1,
-            "-": 1,
-            "sin": 5,
-            "cos": 5,
-            "exp": 5  # e^(x)
-        }
+        self.operator_priority = OPERATOR_PRIORITY
 
         # create a list containing all operator symbols to simplify lookup
         self.operator_list = list(self.operator_priority.keys())
 
-        # compute the length of the longest operator name
-        self.longest_operator_length = 0
-        for op in self.operator_list:
-            if len(op) > self.longest_operator_length:
-                self.longest_operator_length = len(op)
-
         # store the mathematical expression without white spaces
         self.mathematical_expression = self.delete_white_spaces(
             mathematical_expression)
@@ -42,122 +69,205 @@ class Expression:
         # store the length of the encapsulated expression
         self.mathematical_expression_length = len(self.mathematical_expression)
 
-        # create token list
-        self.token_list = self.tokenize_expression()
+        # create token list, stored as tuple because expressions returned
+        # by parse() are shared
+        self.token_list = tuple(self.tokenize_expression())
 
         # create tree
         self.root_node = self.create_tree(self.token_list)
 
+        # function created by compile(), see below
+        self.compiled_function = None
+
+        # functions created by to_function(), see below
+        self.generated_functions = {}
+
+    @classmethod
+    def from_tree(cls, root_node):
+        """
+        Create an expression out of an existing tree.
+
+        The expression was not parsed, therefore mathematical_expression is
+        None and token_list is empty. str() still returns the expression of
+        the tree.
+        """
+        expression = cls.__new__(cls)
+        expression.operator_priority = OPERATOR_PRIORITY
+        expression.operator_list = list(expression.operator_priority.keys())
+        expression.mathematical_expression = None
+        expression.mathematical_expression_length = None
+        expression.token_list = ()
+        expression.root_node = root_node
+        expression.compiled_function = None
+        expression.generated_functions = {}
+        return expression
+
     def __str__(self):
         """Return string representation of the tree."""
         return str(self.root_node)
 
     def delete_white_spaces(self, expression):
         """Remove all white spaces within a given string."""
-        expression_without_white_spaces = ""
-        for character in expression:
-            if not character.isspace():
-                expression_without_white_spaces += character
-        return expression_without_white_spaces
+        return "".join(expression.split())
 
     def evaluate(self, variables=None):
         """Evaluate the tree."""
+        # the tree may consist of a single constant or variable, e.g. after
+        # optimize() or derivative()
+        if isinstance(self.root_node, Value.Constant):
+            return self.root_node.value
+        elif isinstance(self.root_node, Value.Variable):
+            return variables[str(self.root_node)]
         return self.root_node.evaluate(variables)
 
+    def compile(self):
+        """
+        Return a function evaluating the tree for given variables.
+
+        The tree is compiled only once, afterwards the same function is
+        returned. Use it instead of evaluate() if the expression has to be
+        evaluated repeatedly.
+        """
+        if self.compiled_function is None:
+            self.compiled_function = Compiler.compile_tree(self.root_node)
+        return self.compiled_function
+
+    def optimize(self):
+        """
+        Return a simplified expression.
+
+        Constant subtrees are evaluated and identical subtrees are merged,
+        see Optimizer for details.
+        """
+        return Expression.from_tree(
+            Optimizer.Optimizer().optimize(self.root_node))
+
+    def gradient(self, variables, mode=None):
+        """
+        Return the value and the gradient for the given variables.
+
+        The gradient is a dictionary mapping every variable of the
+        expression to the corresponding partial derivative, see
+        AutoDiff.gradient for the meaning of mode.
+        """
+        return AutoDiff.gradient(self.root_node, variables, mode)
+
+    def derivative(self, variable_name):
+        """Return the simplified derivative with respect to given variable."""
+        return Expression.from_tree(
+            Derivative.derivative(self.root_node, variable_name))
+
+    def compile_with_derivative(self, variable_name):
+        """
+        Return a function evaluating the expression and its derivative.
+
+        The function takes a variables dictionary and returns a list of
+        both values. Subexpressions occurring in both trees are evaluated
+        only once.
+        """
+        optimizer = Optimizer.Optimizer()
+        root_node = optimizer.optimize(self.root_node)
+        derivative_root_node = Derivative.derivative(
+            root_node, variable_name, optimizer)
+        return Compiler.compile_trees([root_node, derivative_root_node])
+
+    def evaluate_many(self, bindings, workers=None, chunksize=1000,
+                      ordered=True):
+        """
+        Evaluate the tree for many variables dictionaries in parallel.
+
+        Return a generator of the results, see
+        ParallelEvaluator.evaluate_many for the meaning of the arguments.
+        """
+        return ParallelEvaluator.evaluate_many(
+            self.root_node, bindings, workers, chunksize, ordered)
+
+    def incremental_evaluator(self, variables):
+        """
+        Return an evaluator caching the values of all subtrees.
+
+        Use set(variable_name, value) of the evaluator to change single
+        variables, its evaluate() recomputes only the affected subtrees.
+        """
+        return IncrementalEvaluator.IncrementalEvaluator(
+            self.root_node, variables)
+
+    def evaluate_interval(self, variables):
+        """
+        Return an Interval containing all possible values of the tree.
+
+        Every variable is mapped to a tuple (lo, hi) of its bounds.
+        """
+        return Interval.evaluate_interval(self.root_node, variables)
+
+    def subdivide(self, box, minimum_width):
+        """
+        Return the boxes on which the expression is positive for sure.
+
+        See Interval.subdivide for details.
+        """
+        return Interval.subdivide(self.root_node, box, minimum_width)
+
+    def to_function(self, arg_order=None):
+        """
+        Return a Python function taking the variables as positional arguments.
+
+        arg_order is the list of variable names in the order of the
+        arguments, by default all variables sorted by name. The source
+        code of the function is generated and compiled only once per
+        argument order.
+        """
+        if arg_order is None:
+            arg_order = sorted(Node.variable_names(self.root_node))
+        arg_order = tuple(arg_order)
+        if arg_order not in self.generated_functions:
+            self.generated_functions[arg_order] = \
+                CodeGenerator.generate_function(self.root_node, arg_order)
+        return self.generated_functions[arg_order]
+
+    def evaluate_array(self, variables, out=None, chunk_size=None):
+        """
+        Evaluate the tree element-wise on NumPy arrays.
+
+        Every variable is mapped to a scalar or an array, see
+        ArrayEvaluator.evaluate_array for the meaning of out and chunk_size.
+        """
+        return ArrayEvaluator.evaluate_array(
+            self.root_node, variables, out, chunk_size)
+
     def tokenize_expression(self):
         """Return a list of the expression's single tokens in order."""
         # list to store the expression's different tokens in order
         token_list = []
-        # temporary list to construct constants or variables with
-        # more than one character
-        related_elements = []
-        # evaluate the expression character by character
-        pointer = 0
-        while pointer < self.mathematical_expression_length:
-            character = self.mathematical_expression[pointer]
-            if character.isalpha():
-                # character is the first letter of a variable or an operator,
-                # therefore check the following letters to decide which case
-                # applies
-                related_elements.append(character)
-                pointer += 1
-                while pointer < self.mathematical_expression_length:
-                    character = self.mathematical_expression[pointer]
-                    if self.mathematical_expression[pointer].isalpha():
-                        related_elements.append(character)
-                        pointer += 1
-                        # only check if a valid operator is found when
-                        # the length of the found operator is less than
-                        # or equal to the length of the longest possible
-                        # operator
-                        if len(related_elements) <= \
-                                self.longest_operator_length:
-                            actual_operator = "".join(related_elements)
-                            if actual_operator in self.operator_list:
-                                operator_object = self.create_operator(
-                                    actual_operator)
-                                token_list.append(operator_object)
-                                break
-                    else:
-                        # the actual subset of the expression has to be a
-                        # variable
-                        variable = "".join(related_elements)
-                        variable_object = Value.Variable(variable)
-                        token_list.append(variable_object)
-                        break
-                # Check if the pointer has reached the end of the expression
-                # while scanning letters. If so, the expression ends with
-                # a variable.
-                if pointer == self.mathematical_expression_length:
-                    variable = "".join(related_elements)
-                    variable_object = Value.Variable(variable)
-                    token_list.append(variable_object)
-            elif character.isdigit():
-                # Character is the first digit of an integer, therefore check
-                # if it contains more than one digit.
-                #
-                # TODO: Maybe generalize this part to support floating
-                # point numbers as well.
-                related_elements.append(int(character))
-                pointer += 1
-                while pointer < self.mathematical_expression_length:
-                    if self.mathematical_expression[pointer].isdigit():
-                        related_elements.append(
-                            int(self.mathematical_expression[pointer])
-                        )
-                        pointer += 1
-                    elif self.mathematical_expression[pointer].isalpha():
-                        raise ValueError(
-                            "A number has to be followed by either an \
-                            operator or a bracket.")
-                    else:
-                        break
-
-                # construct an integer out of the stored digits
-                length = len(related_elements)
-                constant = 0
-                for digit in related_elements:
-                    constant += digit * (10 ** (length - 1))
-                    length -= 1
-
-                # create an object representing the constant and insert
-                # it into the list
-                constant_object = Value.Constant(constant)
-                token_list.append(constant_object)
+        # scan the expression once, every match is either a number, a name
+        # (operator or variable) or a single special symbol
+        for match in TOKEN_PATTERN.finditer(self.mathematical_expression):
+            number, name, character = match.groups()
+            if number is not None:
+                if match.end() < self.mathematical_expression_length \
+                        and self.mathematical_expression[
+                            match.end()].isalpha():
+                    raise ValueError(
+                        "A number has to be followed by either an "
+                        "operator or a bracket.")
+                if "." in number or "e" in number or "E" in number:
+                    token_list.append(Value.Constant(float(number)))
+                else:
+                    token_list.append(Value.Constant(int(number)))
+            elif name is not None:
+                if name in self.operator_priority:
+                    token_list.append(self.create_operator(name))
+                else:
+                    token_list.append(Value.Variable(name))
+            elif character == "(" or character == ")":
+                token_list.append(character)
             else:
-                # character is a special symbol and could be a bracket or
-                # a single operator
+                # character is a special symbol and has to be an operator
                 operator_object = self.create_operator(character)
                 if operator_object is None:
-                    if character == "(" or character == ")":
-                        token_list.append(character)
-                    else:
-                        raise ValueError(
-                            "Expression contains unknown operators.")
-                else:
-                    token_list.append(operator_object)
-                pointer += 1
-            del related_elements[:]
+                    raise ValueError(
+                        "Expression contains unknown operators.")
+                token_list.append(operator_object)
         return token_list
 
     def create_operator(self, operator_symbol):
@@ -166,116 +276,173 @@ class Expression:
 
         Return None if the operator symbol is unknown.
         """
-        if operator_symbol == "^":
-            operator_object = Operator.Operator(
-                "^", lambda x, y: x ** y)
-        elif operator_symbol == "*":
-            operator_object = Operator.Operator("*", lambda x, y: x * y)
-        elif operator_symbol == "/":
-            operator_object = Operator.Operator("/", lambda x, y: x / y)
-        elif operator_symbol == "%":
-            operator_object = Operator.Operator("%", lambda x, y: x % y)
-        elif operator_symbol == "+":
-            operator_object = Operator.Operator("+", lambda x, y: x + y)
-        elif operator_symbol == "-":
-            operator_object = Operator.Operator("-", lambda x, y: x - y)
-        elif operator_symbol == "sin":
-            operator_object = Operator.Operator("sin", lambda x: sin(x))
-        elif operator_symbol == "cos":
-            operator_object = Operator.Operator("cos", lambda x: cos(x))
-        elif operator_symbol == "exp":
-            operator_object = Operator.Operator("exp", lambda x: exp(x))
-        else:
-            operator_object = None
-        return operator_object
+        return Operator.create_operator(operator_symbol)
 
     def create_tree(self, token_list):
-        """Create an expression tree out of a given token list."""
-        # check if the token list contains an operator
-        operator_is_present = False
+        """
+        Create an expression tree out of a given token list.
+
+        Uses the shunting-yard algorithm, therefore every token is visited
+        only once and no recursion is needed, no matter how long or deeply
+        nested the expression is. All bivalent operators except "^" are
+        left associative. A "-" in front of an operand negates it.
+        """
+        # stack of already created subtrees
+        operand_stack = []
+        # stack of pending operators, every entry is a tuple of the
+        # operator's priority, the operator itself and a flag whether it is
+        # applied to a single operand, opening brackets are stored as
+        # BRACKET
+        operator_stack = []
+        # an operand is expected at the beginning, after an opening bracket
+        # and after an operator
+        expect_operand = True
         for token in token_list:
-            if isinstance(token, Operator.Operator):
-                operator_is_present = True
-                break
-        # evaluate the encapsulated list token by token and search for
-        # the operator with the highest priority which is not nested
-        if operator_is_present:
-            operator_info = []
-            # collect neccessary infos to all operators in the token list
-            open_brackets = 0
-            pointer = 0
-            while pointer < len(token_list):
-                token = token_list[pointer]
-                if token == "(":
-                    open_brackets += 1
-                elif token == ")":
-                    open_brackets -= 1
-                elif isinstance(token, Operator.Operator):
-                    info = (
-                        # the operator's index in the token list
-                        pointer,
-                        # the operator's depth in the tree
-                        open_brackets,
-                        # the operator's priority
-                        self.operator_priority[str(token)]
-                    )
-                    operator_info.append(info)
-                pointer += 1
-            # filter the operator info list by the lowest operator depth
-            minimum_depth = maxsize  # highest possible value of type integer
-            for info in operator_info:
-                if info[1] < minimum_depth:
-                    minimum_depth = info[1]
-            # filter the operator info list by the lowest priority
-            lowest_priority_info = (None, maxsize, maxsize)
-            pointer = 0
-            while pointer < len(operator_info):
-                info = operator_info[pointer]
-                if info[1] == minimum_depth \
-                        and info[2] < lowest_priority_info[2]:
-                    lowest_priority_info = info
-                pointer += 1
-            lowest_priority_operator = token_list[lowest_priority_info[0]]
-            if lowest_priority_operator.is_monovalent:
-                pointer = lowest_priority_info[0] + 1
-                if token_list[pointer] == "(":
-                    pointer += 1
-                    open_brackets = 1
-                    while pointer < len(token_list):
-                        if open_brackets == 0:
-                            break
-                        token = token_list[pointer]
-                        if token == "(":
-                            open_brackets += 1
-                        if token == ")":
-                            open_brackets -= 1
-                        pointer += 1
-                    node = Node.Node(
-                        lowest_priority_operator,
-                        self.create_tree(
-                            token_list[lowest_priority_info[0] + 1: pointer]
-                        )
-                    )
+            if isinstance(token, Value.Value):
+                if not expect_operand:
+                    raise ValueError("Invalid input.")
+                operand_stack.append(token)
+                expect_operand = False
+            elif token == "(":
+                if not expect_operand:
+                    raise ValueError("Invalid input.")
+                operator_stack.append(BRACKET)
+            elif token == ")":
+                if expect_operand:
+                    raise ValueError("Invalid input.")
+                while operator_stack and operator_stack[-1] is not BRACKET:
+                    self.apply_operator(operator_stack.pop(), operand_stack)
+                if not operator_stack:
+                    raise ValueError("Brackets are not balanced.")
+                operator_stack.pop()
+            elif expect_operand:
+                # the operator is applied to the following operand only
+                if token.is_monovalent:
+                    priority = self.operator_priority[str(token)]
+                elif str(token) == "-":
+                    priority = NEGATION_PRIORITY
                 else:
-                    node = Node.Node(
-                        lowest_priority_operator,
-                        self.create_tree(
-                            token_list[pointer]
-                        )
-                    )
+                    raise ValueError("Invalid input.")
+                operator_stack.append((priority, token, True))
             else:
-                node = Node.Node(
-                    lowest_priority_operator,
-                    self.create_tree(token_list[:lowest_priority_info[0]]),
-                    self.create_tree(token_list[lowest_priority_info[0] + 1:])
-                )
-            return node
-        elif len(token_list) >= 1:
-            new_token_list = []
-            for token in token_list:
-                if token != "(" and token != ")":
-                    new_token_list.append(token)
-            if len(new_token_list) == 1:
-                return new_token_list[0]
+                if token.is_monovalent:
+                    raise ValueError("Invalid input.")
+                # apply all pending operators which bind more strongly
+                priority = self.operator_priority[str(token)]
+                right_associative = str(token) in RIGHT_ASSOCIATIVE_OPERATORS
+                while operator_stack:
+                    pending_priority = operator_stack[-1][0]
+                    if pending_priority > priority or \
+                            (pending_priority == priority
+                             and not right_associative):
+                        self.apply_operator(
+                            operator_stack.pop(), operand_stack)
+                    else:
+                        break
+                operator_stack.append((priority, token, False))
+                expect_operand = True
+        if expect_operand:
+            raise ValueError("Invalid input.")
+        while operator_stack:
+            entry = operator_stack.pop()
+            if entry is BRACKET:
+                raise ValueError("Brackets are not balanced.")
+            self.apply_operator(entry, operand_stack)
+        return operand_stack[0]
+
+    def apply_operator(self, entry, operand_stack):
+        """Replace the topmost operands by a node of the given operator."""
+        _, operator_object, is_prefix = entry
+        if not is_prefix:
+            right_child = operand_stack.pop()
+            left_child = operand_stack.pop()
+            node = Node.Node(operator_object, left_child, right_child)
+        elif operator_object.is_monovalent:
+            node = Node.Node(operator_object, operand_stack.pop())
+        else:
+            # negation, represented as a subtraction from zero unless the
+            # operand is a constant
+            operand = operand_stack.pop()
+            if isinstance(operand, Value.Constant):
+                node = Value.Constant(-operand.value)
             else:
-                raise ValueError("Invalid input.")
+                node = Node.Node(operator_object, Value.Constant(0), operand)
+        operand_stack.append(node)
+
+
+class ParseCache:
+    """
+    Class mapping expression strings to their parsed Expression instances.
+
+    Strings which only differ in white spaces share the same entry. If the
+    cache is full, the least recently used entry is removed.
+    """
+
+    def __init__(self, maximum_size=1024):
+        """Create an empty cache storing at most maximum_size expressions."""
+        self.maximum_size = maximum_size
+        self.expressions = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # parse() may be called from different threads
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of cached expressions."""
+        return len(self.expressions)
+
+    def parse(self, mathematical_expression):
+        """Return the cached Expression or create and store a new one."""
+        key = "".join(mathematical_expression.split())
+        with self.lock:
+            expression = self.expressions.get(key)
+            if expression is not None:
+                self.expressions.move_to_end(key)
+                self.hits += 1
+                return expression
+            self.misses += 1
+        # parse without holding the lock, invalid expressions raise a
+        # ValueError and are not cached
+        expression = Expression(key)
+        with self.lock:
+            self.expressions[key] = expression
+            self.expressions.move_to_end(key)
+            while len(self.expressions) > self.maximum_size:
+                self.expressions.popitem(last=False)
+                self.evictions += 1
+        return expression
+
+    def statistics(self):
+        """Return the number of hits, misses and evictions as dictionary."""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self.expressions),
+                "maximum_size": self.maximum_size
+            }
+
+    def clear(self):
+        """Remove all cached expressions and reset the statistics."""
+        with self.lock:
+            self.expressions.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+# cache used by parse()
+PARSE_CACHE = ParseCache()
+
+
+def parse(mathematical_expression):
+    """
+    Return the Expression of the given string.
+
+    Expressions are cached, therefore parsing the same string (ignoring
+    white spaces) again returns the same instance. Its tree is immutable
+    and may be shared freely.
+    """
+    return PARSE_CACHE.parse(mathematical_expression)
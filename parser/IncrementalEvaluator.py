@@ -0,0 +1,120 @@
+"""Module to re-evaluate expression trees after single variables changed."""
+import Node
+import Value
+
+
+class IncrementalEvaluator:
+    """
+    Class evaluating a tree repeatedly for slowly changing variables.
+
+    The value of every subtree is cached. Changing a variable only marks
+    the subtrees depending on it, evaluate() then recomputes just these
+    subtrees and reuses the cached values of all others.
+    """
+
+    def __init__(self, root_node, variables):
+        """Evaluate the tree once for the given variables dictionary."""
+        # all nodes in post-order, i.e. every node is stored after its
+        # children, shared subtrees are stored only once
+        self.nodes = Node.topological_order(root_node)[0]
+        # index of the children of every node (None for leaves and the
+        # missing right child of monovalent operators)
+        self.left_indices = []
+        self.right_indices = []
+        # indices of the variable leaves of every variable name
+        self.variable_indices = {}
+        indices = {}
+        for index, node in enumerate(self.nodes):
+            indices[id(node)] = index
+            if isinstance(node, Value.Value):
+                self.left_indices.append(None)
+                self.right_indices.append(None)
+                if isinstance(node, Value.Variable):
+                    self.variable_indices.setdefault(
+                        str(node), []).append(index)
+            else:
+                self.left_indices.append(indices[id(node.left_child)])
+                self.right_indices.append(indices.get(id(node.right_child)))
+
+        # list of the parents of every node
+        parents = [[] for _ in self.nodes]
+        for index in range(len(self.nodes)):
+            for child_index in (self.left_indices[index],
+                                self.right_indices[index]):
+                if child_index is not None:
+                    parents[child_index].append(index)
+
+        # indices of all nodes depending on a variable in post-order, these
+        # are exactly the nodes which have to be recomputed if it changes
+        self.dependent_indices = {}
+        for name, variable_indices in self.variable_indices.items():
+            dependent = set()
+            pending = list(variable_indices)
+            while pending:
+                index = pending.pop()
+                for parent_index in parents[index]:
+                    if parent_index not in dependent:
+                        dependent.add(parent_index)
+                        pending.append(parent_index)
+            self.dependent_indices[name] = sorted(dependent)
+
+        self.values = [None] * len(self.nodes)
+        self.variables = {}
+        for name in self.variable_indices:
+            self.variables[name] = variables[name]
+        for index in range(len(self.nodes)):
+            self.compute(index)
+        # names of the variables changed since the last evaluation
+        self.changed_variables = set()
+
+    def compute(self, index):
+        """Compute the value of a single node out of its children."""
+        node = self.nodes[index]
+        if isinstance(node, Value.Constant):
+            self.values[index] = node.value
+        elif isinstance(node, Value.Variable):
+            self.values[index] = self.variables[str(node)]
+        elif self.right_indices[index] is None:
+            self.values[index] = node.operator.function(
+                self.values[self.left_indices[index]])
+        else:
+            self.values[index] = node.operator.function(
+                self.values[self.left_indices[index]],
+                self.values[self.right_indices[index]])
+
+    def set(self, variable_name, value):
+        """Change the value of a single variable."""
+        if variable_name not in self.variables:
+            # the tree does not depend on this variable
+            return
+        if self.variables[variable_name] == value:
+            return
+        self.variables[variable_name] = value
+        for index in self.variable_indices[variable_name]:
+            self.values[index] = value
+        self.changed_variables.add(variable_name)
+
+    def update(self, variables):
+        """Change the values of all variables of the given dictionary."""
+        for variable_name, value in variables.items():
+            self.set(variable_name, value)
+
+    def evaluate(self):
+        """Return the value of the tree for the current variables."""
+        if len(self.changed_variables) == 1:
+            variable_name, = self.changed_variables
+            indices = self.dependent_indices[variable_name]
+        elif self.changed_variables:
+            indices = set()
+            for variable_name in self.changed_variables:
+                indices.update(self.dependent_indices[variable_name])
+            indices = sorted(indices)
+        else:
+            indices = []
+        for index in indices:
+            self.compute(index)
+        # the variables are marked as changed until all dependent nodes
+        # are recomputed, so they are recomputed again if compute raised
+        # an error
+        self.changed_variables.clear()
+        return self.values[-1]
@@ -0,0 +1,305 @@
+"""Module to evaluate expression trees with interval arithmetic."""
+import math
+
+import Node
+import Value
+
+
+def round_down(value):
+    """Return the next smaller floating point number."""
+    return math.nextafter(value, -math.inf)
+
+
+def round_up(value):
+    """Return the next greater floating point number."""
+    return math.nextafter(value, math.inf)
+
+
+def to_float(value):
+    """Return the value as float, infinity if it is too large."""
+    try:
+        return float(value)
+    except OverflowError:
+        return math.inf if value > 0 else -math.inf
+
+
+def float_interval(lower_bound, upper_bound):
+    """
+    Return the interval with the bounds converted to floats.
+
+    Integers which are not exactly representable are rounded outwards.
+    """
+    lower_float = to_float(lower_bound)
+    if lower_float > lower_bound:
+        lower_float = round_down(lower_float)
+    upper_float = to_float(upper_bound)
+    if upper_float < upper_bound:
+        upper_float = round_up(upper_float)
+    return Interval(lower_float, upper_float)
+
+
+def power(base, exponent):
+    """Return base^exponent or infinity if the result is too large."""
+    base = to_float(base)
+    try:
+        return base ** exponent
+    except OverflowError:
+        if base < 0 and float(exponent).is_integer() and exponent % 2 == 1:
+            # odd powers keep the sign of the base
+            return -math.inf
+        return math.inf
+
+
+class Interval:
+    """
+    Class representing a closed interval of real numbers.
+
+    Every operation returns an interval containing all possible results,
+    the bounds are rounded outwards to compensate rounding errors.
+    """
+
+    __slots__ = ("lower_bound", "upper_bound")
+
+    def __init__(self, lower_bound, upper_bound):
+        """Create the interval [lower_bound, upper_bound]."""
+        if lower_bound > upper_bound:
+            raise ValueError(
+                "The lower bound must not be greater than the upper bound.")
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+
+    def __str__(self):
+        """Return a string representation of the interval."""
+        return "[" + str(self.lower_bound) + ", " + str(self.upper_bound) \
+            + "]"
+
+    def __iter__(self):
+        """Make the interval unpackable into its bounds."""
+        return iter((self.lower_bound, self.upper_bound))
+
+    def __contains__(self, value):
+        """Return true if the value lies within the interval."""
+        return self.lower_bound <= value <= self.upper_bound
+
+    def width(self):
+        """Return the width of the interval."""
+        return self.upper_bound - self.lower_bound
+
+    def is_degenerate(self):
+        """Return true if the interval contains a single number."""
+        return self.lower_bound == self.upper_bound
+
+
+# the interval of all real numbers
+UNBOUNDED = Interval(-math.inf, math.inf)
+
+
+def rounded_hull(values):
+    """Return the smallest interval containing all values, rounded out."""
+    values = [0 if math.isnan(value) else value for value in values]
+    return Interval(round_down(min(values)), round_up(max(values)))
+
+
+def add(a, b):
+    """Return the interval of x+y for x in a and y in b."""
+    return Interval(round_down(a.lower_bound + b.lower_bound),
+                    round_up(a.upper_bound + b.upper_bound))
+
+
+def subtract(a, b):
+    """Return the interval of x-y for x in a and y in b."""
+    return Interval(round_down(a.lower_bound - b.upper_bound),
+                    round_up(a.upper_bound - b.lower_bound))
+
+
+def multiply(a, b):
+    """Return the interval of x*y for x in a and y in b."""
+    # products like 0*inf are NaN, which are treated as 0
+    return rounded_hull([x * y for x in a for y in b])
+
+
+def divide(a, b):
+    """Return the interval of x/y for x in a and y in b."""
+    if 0 in b:
+        return UNBOUNDED
+    return rounded_hull([x / y for x in a for y in b])
+
+
+def modulo(a, b):
+    """Return the interval of x%y for x in a and y in b."""
+    if b.is_degenerate() and b.lower_bound != 0 \
+            and math.isfinite(a.width()):
+        divisor = b.lower_bound
+        lower_remainder = a.lower_bound % divisor
+        upper_remainder = a.upper_bound % divisor
+        # x%y increases with x within a period and drops at its end,
+        # therefore the interval lies within a single period if it is
+        # narrower than the period and the remainders do not drop (the
+        # quotients are not reliable, e.g. -5e-324/y is rounded to -0.0,
+        # but -5e-324 % y is y)
+        if a.width() < abs(divisor) and lower_remainder <= upper_remainder:
+            return rounded_hull([lower_remainder, upper_remainder])
+    # the result has the sign of the divisor and is smaller in magnitude
+    return Interval(min(b.lower_bound, 0), max(b.upper_bound, 0))
+
+
+def raise_to_power(a, b):
+    """Return the interval of x^y for x in a and y in b."""
+    if b.is_degenerate() and float(b.lower_bound).is_integer():
+        exponent = int(b.lower_bound)
+        if exponent == 0:
+            return Interval(1, 1)
+        if exponent < 0:
+            if 0 in a:
+                return UNBOUNDED
+            return divide(Interval(1, 1), raise_to_power(
+                a, Interval(-exponent, -exponent)))
+        lower = power(a.lower_bound, exponent)
+        upper = power(a.upper_bound, exponent)
+        if exponent % 2 == 0 and 0 in a:
+            # even power of an interval containing its minimum 0
+            return rounded_hull([0, lower, upper])
+        return rounded_hull([lower, upper])
+    if a.lower_bound > 0 or (a.lower_bound == 0 and b.lower_bound > 0):
+        # x^y is monotonic in x and y for positive x, therefore the
+        # extreme values are found at the corners
+        return rounded_hull([power(x, y) for x in a for y in b])
+    # the result is not a real number for negative bases
+    return UNBOUNDED
+
+
+def contains_periodic_point(a, offset):
+    """Return true if a contains offset + 2*k*pi for an integer k."""
+    k = math.ceil((a.lower_bound - offset) / (2 * math.pi))
+    return offset + 2 * k * math.pi <= a.upper_bound
+
+
+def sine(a):
+    """Return the interval of sin(x) for x in a."""
+    if a.width() >= 2 * math.pi or not math.isfinite(a.width()):
+        return Interval(-1, 1)
+    values = [math.sin(a.lower_bound), math.sin(a.upper_bound)]
+    if contains_periodic_point(a, math.pi / 2):
+        values.append(1)
+    if contains_periodic_point(a, -math.pi / 2):
+        values.append(-1)
+    bounds = rounded_hull(values)
+    return Interval(max(bounds.lower_bound, -1), min(bounds.upper_bound, 1))
+
+
+def cosine(a):
+    """Return the interval of cos(x) for x in a."""
+    if a.width() >= 2 * math.pi or not math.isfinite(a.width()):
+        return Interval(-1, 1)
+    values = [math.cos(a.lower_bound), math.cos(a.upper_bound)]
+    if contains_periodic_point(a, 0):
+        values.append(1)
+    if contains_periodic_point(a, math.pi):
+        values.append(-1)
+    bounds = rounded_hull(values)
+    return Interval(max(bounds.lower_bound, -1), min(bounds.upper_bound, 1))
+
+
+def exponential(a):
+    """Return the interval of exp(x) for x in a."""
+    return rounded_hull([safe_exp(a.lower_bound), safe_exp(a.upper_bound)])
+
+
+def safe_exp(value):
+    """Return exp(value) or infinity if the result is too large."""
+    try:
+        return math.exp(value)
+    except OverflowError:
+        return math.inf
+
+
+# interval functions corresponding to the operator symbols
+FUNCTIONS = {
+    "^": raise_to_power,
+    "*": multiply,
+    "/": divide,
+    "%": modulo,
+    "+": add,
+    "-": subtract,
+    "sin": sine,
+    "cos": cosine,
+    "exp": exponential
+}
+
+
+def evaluate_interval(root_node, variables):
+    """
+    Return an interval containing all values of the tree.
+
+    variables:  dictionary mapping every variable to a tuple (lo, hi) of
+                its bounds or to a single number
+    """
+    # all bounds are floats, so too large results become infinity instead
+    # of raising an OverflowError
+    intervals = {}
+    for name, bounds in variables.items():
+        if isinstance(bounds, (Interval, tuple)):
+            lower_bound, upper_bound = bounds
+        else:
+            lower_bound = upper_bound = bounds
+        intervals[name] = float_interval(lower_bound, upper_bound)
+
+    results = {}
+    for node in Node.topological_order(root_node)[0]:
+        if isinstance(node, Value.Constant):
+            results[id(node)] = float_interval(node.value, node.value)
+        elif isinstance(node, Value.Variable):
+            results[id(node)] = intervals[str(node)]
+        else:
+            function = FUNCTIONS[str(node.operator)]
+            if node.operator.is_monovalent:
+                results[id(node)] = function(results[id(node.left_child)])
+            else:
+                results[id(node)] = function(
+                    results[id(node.left_child)],
+                    results[id(node.right_child)])
+    return results[id(root_node)]
+
+
+def subdivide(root_node, box, minimum_width):
+    """
+    Find the regions of the box in which the tree is positive.
+
+    box:            dictionary mapping every variable to a tuple (lo, hi)
+    minimum_width:  boxes are not split any further if all their sides
+                    are at most this wide
+
+    Boxes are split in half along their widest side until the interval
+    evaluation proves that the tree is either positive or not positive on
+    the whole box, those boxes are kept or pruned respectively. Return a
+    list of the boxes on which the tree is positive for sure and a list of
+    the boxes of minimum width which could not be decided.
+    """
+    positive_boxes = []
+    undecided_boxes = []
+    pending = [box]
+    while pending:
+        box = pending.pop()
+        bounds = evaluate_interval(root_node, box)
+        if bounds.lower_bound > 0:
+            positive_boxes.append(box)
+            continue
+        if bounds.upper_bound <= 0:
+            continue
+        if not box:
+            # nothing left to split
+            undecided_boxes.append(box)
+            continue
+        widest_name = max(box, key=lambda name: box[name][1] - box[name][0])
+        lower_bound, upper_bound = box[widest_name]
+        if upper_bound - lower_bound <= minimum_width:
+            undecided_boxes.append(box)
+            continue
+        middle = (lower_bound + upper_bound) / 2
+        lower_half = dict(box)
+        lower_half[widest_name] = (lower_bound, middle)
+        upper_half = dict(box)
+        upper_half[widest_name] = (middle, upper_bound)
+        pending.append(upper_half)
+        pending.append(lower_half)
+    return positive_boxes, undecided_boxes
@@ -12,3 +12,9 @@ if __name__ == "__main__":
 
     print(expression_2)
     print(expression_2.evaluate(variables))
+
+    # the derivative of a linear term is a single constant
+    expression_3 = Expression.Expression("3 * x").derivative("x")
+
+    print(expression_3)
+    print(expression_3.evaluate(variables))
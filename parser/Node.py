@@ -4,6 +4,10 @@ import Value
 class Node:
     """Class representing a single node of the expression tree."""
 
+    # Node, Value and Operator use slots instead of a dictionary per
+    # instance to save memory
+    __slots__ = ("operator", "left_child", "right_child")
+
     def __init__(self, operator, left_child, right_child=None):
         """
         Create a new node.
@@ -11,9 +15,20 @@ class Node:
         left_child, right_child:    either a Node, a subclass of Value
                                     or None
         """
-        self.operator = operator
-        self.left_child = left_child
-        self.right_child = right_child
+        # nodes, values and operators are immutable, therefore trees can be
+        # shared
+        object.__setattr__(self, "operator", operator)
+        object.__setattr__(self, "left_child", left_child)
+        object.__setattr__(self, "right_child", right_child)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Node instances are immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError("Node instances are immutable.")
+
+    def __reduce__(self):
+        return (Node, (self.operator, self.left_child, self.right_child))
 
     def __str__(self):
         if self.operator.is_monovalent:
@@ -99,3 +114,40 @@ class Node:
                         self.left_child.evaluate(variables),
                         self.right_child.evaluate(variables)
                     )
+
+
+def topological_order(*root_nodes):
+    """
+    Return all nodes of the trees in post-order and all variable names.
+
+    Every node is returned after its children, nodes shared by several
+    parents (see Optimizer) are returned only once. The variable names are
+    returned in order of their first occurrence.
+    """
+    ordered_nodes = []
+    names = []
+    visited = set()
+    pending = [(root_node, False) for root_node in reversed(root_nodes)]
+    while pending:
+        node, children_visited = pending.pop()
+        if children_visited:
+            ordered_nodes.append(node)
+            continue
+        if id(node) in visited:
+            continue
+        visited.add(id(node))
+        if isinstance(node, Value.Value):
+            if isinstance(node, Value.Variable) and str(node) not in names:
+                names.append(str(node))
+            ordered_nodes.append(node)
+        else:
+            pending.append((node, True))
+            if node.right_child is not None:
+                pending.append((node.right_child, False))
+            pending.append((node.left_child, False))
+    return ordered_nodes, names
+
+
+def variable_names(root_node):
+    """Return the set of all variable names occurring in the tree."""
+    return set(topological_order(root_node)[1])
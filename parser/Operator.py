@@ -1,4 +1,21 @@
 from inspect import signature
+from math import cos, exp, sin
+from operator import add, mod, mul, pow, sub, truediv
+
+# functions corresponding to the operator symbols, builtins are used instead
+# of lambdas because they can be called without the overhead of a Python
+# function call and can be pickled
+FUNCTIONS = {
+    "^": pow,
+    "*": mul,
+    "/": truediv,
+    "%": mod,
+    "+": add,
+    "-": sub,
+    "sin": sin,
+    "cos": cos,
+    "exp": exp
+}
 
 
 class Operator:
@@ -8,6 +25,8 @@ class Operator:
     Connects the operator symbol with its corresponding function.
     """
 
+    __slots__ = ("operator_symbol", "function", "is_monovalent")
+
     def __init__(self, operator_symbol, function):
         """
         Create an instance of Operator.
@@ -16,18 +35,53 @@ class Operator:
         function:           the corresponding monovalent or bivalent
                             function
         """
-        self.operator_symbol = operator_symbol
-        self.function = function
+        object.__setattr__(self, "operator_symbol", operator_symbol)
+        object.__setattr__(self, "function", function)
         # evaluate the given function's number of arguments
         number_of_arguments = len(signature(function).parameters)
         if number_of_arguments == 1:
-            self.is_monovalent = True
+            object.__setattr__(self, "is_monovalent", True)
         elif number_of_arguments == 2:
-            self.is_monovalent = False
+            object.__setattr__(self, "is_monovalent", False)
         else:
             raise TypeError(
                 "Only monovalent or bivalent functions are allowed.")
 
+    def __setattr__(self, name, value):
+        """Prevent any modification of the instance."""
+        raise AttributeError("Operator instances are immutable.")
+
+    def __delattr__(self, name):
+        """Prevent any modification of the instance."""
+        raise AttributeError("Operator instances are immutable.")
+
+    def __reduce__(self):
+        """
+        Support pickling, e.g. to send trees to other processes.
+
+        Operators of create_operator are unpickled as the same instance.
+        """
+        if OPERATORS.get(self.operator_symbol) is self:
+            return (create_operator, (self.operator_symbol,))
+        return (Operator, (self.operator_symbol, self.function))
+
     def __str__(self):
         """Return the operator symbol."""
         return self.operator_symbol
+
+
+def create_operator(operator_symbol):
+    """
+    Match the given operator symbol to its corresponding function.
+
+    Return None if the operator symbol is unknown. Operators are immutable,
+    therefore the same instance is returned for every call.
+    """
+    return OPERATORS.get(operator_symbol)
+
+
+# the instances returned by create_operator
+OPERATORS = {
+    operator_symbol: Operator(operator_symbol, function)
+    for operator_symbol, function in FUNCTIONS.items()
+}
@@ -0,0 +1,123 @@
+"""Module to simplify expression trees."""
+from numbers import Number
+
+import Node
+import Value
+
+
+class Optimizer:
+    """
+    Class simplifying expression trees.
+
+    Constant subtrees are replaced by their value and the following
+    identities are applied: x+0 = 0+x = x-0 = x, x*1 = 1*x = x and
+    x^1 = x. They are only applied to integer constants, because e.g.
+    x*1.0 would turn an integer x into a float. x/1 is kept for the same
+    reason.
+
+    Every subtree is created only once per Optimizer instance (hash
+    consing), i.e. identical subtrees are represented by the same object
+    and the resulting tree is a directed acyclic graph. Use
+    Compiler.compile_tree to evaluate shared subtrees only once.
+    """
+
+    def __init__(self):
+        """Create an optimizer with an empty table of subtrees."""
+        # dictionary mapping the key of every created subtree to it
+        self.subtrees = {}
+
+    def optimize(self, root_node):
+        """Return the simplified version of the given tree."""
+        # dictionary mapping the id of every visited node of the given
+        # tree to its simplified version
+        simplified = {}
+        for node in Node.topological_order(root_node)[0]:
+            if isinstance(node, Value.Constant):
+                simplified[id(node)] = self.create_constant(node.value)
+            elif isinstance(node, Value.Variable):
+                simplified[id(node)] = self.create_variable(str(node))
+            else:
+                left_child = simplified[id(node.left_child)]
+                right_child = None
+                if node.right_child is not None:
+                    right_child = simplified[id(node.right_child)]
+                simplified[id(node)] = self.create_node(
+                    node.operator, left_child, right_child)
+        return simplified[id(root_node)]
+
+    def create_constant(self, value):
+        """Return the unique Constant instance of the given value."""
+        # use the representation to keep e.g. 0.0 and -0.0 apart
+        key = (Value.Constant, type(value), repr(value))
+        if key not in self.subtrees:
+            self.subtrees[key] = Value.Constant(value)
+        return self.subtrees[key]
+
+    def create_variable(self, variable_name):
+        """Return the unique Variable instance of the given name."""
+        key = (Value.Variable, variable_name)
+        if key not in self.subtrees:
+            self.subtrees[key] = Value.Variable(variable_name)
+        return self.subtrees[key]
+
+    def create_node(self, operator, left_child, right_child=None):
+        """
+        Return the simplified node of the given operator and children.
+
+        The children have to be created by this optimizer as well.
+        """
+        if isinstance(left_child, Value.Constant) and (
+                right_child is None
+                or isinstance(right_child, Value.Constant)):
+            folded = self.fold(operator, left_child, right_child)
+            if folded is not None:
+                return folded
+
+        symbol = str(operator)
+        if symbol == "+":
+            if is_integer(left_child, 0):
+                return right_child
+            if is_integer(right_child, 0):
+                return left_child
+        elif symbol == "-":
+            if is_integer(right_child, 0):
+                return left_child
+        elif symbol == "*":
+            if is_integer(left_child, 1):
+                return right_child
+            if is_integer(right_child, 1):
+                return left_child
+        elif symbol == "^":
+            # x/1 is not simplified, because it turns an integer x into a
+            # float
+            if is_integer(right_child, 1):
+                return left_child
+
+        key = (symbol, operator.function, id(left_child), id(right_child))
+        if key not in self.subtrees:
+            self.subtrees[key] = Node.Node(operator, left_child, right_child)
+        return self.subtrees[key]
+
+    def fold(self, operator, left_child, right_child):
+        """
+        Return the constant value of the given node.
+
+        Return None if the operator raises an error (e.g. division by
+        zero), which is then raised on evaluation as before.
+        """
+        try:
+            if right_child is None:
+                value = operator.function(left_child.value)
+            else:
+                value = operator.function(left_child.value, right_child.value)
+        except (ArithmeticError, ValueError, TypeError):
+            return None
+        if not isinstance(value, Number):
+            return None
+        return self.create_constant(value)
+
+
+def is_integer(node, value):
+    """Return True if the node is an integer constant of given value."""
+    return isinstance(node, Value.Constant) and type(node.value) is int \
+        and node.value == value
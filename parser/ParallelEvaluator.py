@@ -0,0 +1,95 @@
+"""Module to evaluate an expression tree on many variable bindings."""
+import collections
+import itertools
+import multiprocessing
+import os
+import queue
+
+import Compiler
+
+# compiled tree of the worker process, created by initialize_worker
+worker_function = None
+# error raised while compiling the tree in the worker process
+worker_error = None
+
+
+def initialize_worker(root_node):
+    """Compile the tree once per worker process."""
+    global worker_function, worker_error
+    try:
+        worker_function = Compiler.compile_tree(root_node)
+    except Exception as error:
+        # an initializer raising an error makes the pool start new workers
+        # forever, therefore the error is raised by evaluate_chunk
+        worker_error = error
+
+
+def evaluate_chunk(chunk):
+    """Evaluate the tree of the worker process for a list of bindings."""
+    if worker_error is not None:
+        raise worker_error
+    return [worker_function(variables) for variables in chunk]
+
+
+def evaluate_many(root_node, bindings, workers=None, chunksize=1000,
+                  ordered=True):
+    """
+    Evaluate the tree for every variables dictionary of bindings.
+
+    The results are returned as generator, so bindings may be any (also
+    infinite) iterable. The tree is sent to every worker process only
+    once, the bindings are sent in chunks of the given size. At most two
+    chunks per worker are read ahead of the consumed results.
+
+    workers:    number of worker processes, defaults to the number of
+                CPUs, 1 evaluates all bindings in the calling process
+    ordered:    if False, the results are returned in the order in which
+                they are computed instead of the order of the bindings
+    """
+    # compile the tree before starting any worker, so trees which can not
+    # be compiled raise their error right away
+    function = Compiler.compile_tree(root_node)
+    if workers == 1:
+        for variables in bindings:
+            yield function(variables)
+        return
+
+    bindings = iter(bindings)
+    maximum_pending_chunks = 2 * (workers or os.cpu_count() or 1)
+    with multiprocessing.Pool(
+            workers,
+            initializer=initialize_worker,
+            initargs=(root_node,)) as pool:
+        # results of the submitted chunks in submission order, or in order
+        # of completion via the callbacks if not ordered
+        pending_chunks = collections.deque()
+        completed_chunks = queue.Queue()
+        number_of_pending_chunks = 0
+        is_exhausted = False
+        while True:
+            while not is_exhausted \
+                    and number_of_pending_chunks < maximum_pending_chunks:
+                chunk = list(itertools.islice(bindings, chunksize))
+                if not chunk:
+                    is_exhausted = True
+                    break
+                if ordered:
+                    pending_chunks.append(
+                        pool.apply_async(evaluate_chunk, (chunk,)))
+                else:
+                    pool.apply_async(
+                        evaluate_chunk, (chunk,),
+                        callback=completed_chunks.put,
+                        error_callback=completed_chunks.put)
+                number_of_pending_chunks += 1
+            if number_of_pending_chunks == 0:
+                return
+            if ordered:
+                results = pending_chunks.popleft().get()
+            else:
+                results = completed_chunks.get()
+                if isinstance(results, BaseException):
+                    raise results
+            number_of_pending_chunks -= 1
+            for result in results:
+                yield result
@@ -1,3 +1,4 @@
+import sys
 from numbers import Number
 
 
@@ -6,9 +7,23 @@ class Value:
 
     # TODO: this class should be abstract
 
+    __slots__ = ("value",)
+
     def __init__(self, value):
         """Create a new instance encapsulating the given object."""
-        self.value = value
+        object.__setattr__(self, "value", value)
+
+    def __setattr__(self, name, value):
+        """Prevent any modification of the instance."""
+        raise AttributeError("Value instances are immutable.")
+
+    def __delattr__(self, name):
+        """Prevent any modification of the instance."""
+        raise AttributeError("Value instances are immutable.")
+
+    def __reduce__(self):
+        """Support pickling although the instance is immutable."""
+        return (self.__class__, (self.value,))
 
     def __str__(self):
         """Return a string representation of the encapsulated object."""
@@ -18,6 +33,8 @@ class Value:
 class Constant(Value):
     """Class representing a single constant."""
 
+    __slots__ = ()
+
     def __init__(self, constant):
         """Create a new instance only if the input is a numeric type."""
         if isinstance(constant, Number):
@@ -26,14 +43,26 @@ class Constant(Value):
             raise TypeError(
                 "The Constant class only encapsulates numeric types.")
 
+    def __str__(self):
+        """Return a string representation, bracketed if it is negative."""
+        string_representation = str(self.value)
+        if string_representation.startswith("-"):
+            # otherwise e.g. (-3)^2 would be printed as -3^2 = -(3^2)
+            return "(" + string_representation + ")"
+        return string_representation
+
 
 class Variable(Value):
     """Class representing a single variable."""
 
+    __slots__ = ()
+
     def __init__(self, variable_name):
         """Create a new instance only if the input is a string."""
         if isinstance(variable_name, str):
-            super().__init__(variable_name)
+            # intern the name, so all variables of the same name share
+            # one string
+            super().__init__(sys.intern(variable_name))
         else:
             raise TypeError(
                 "The Variable class only encapsulates strings.")
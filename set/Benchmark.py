@@ -0,0 +1,284 @@
+"""Module to benchmark the CustomSet classes."""
+import argparse
+import itertools
+import json
+import math
+import sys
+import threading
+import time
+import timeit
+
+import numpy as np
+
+import CustomSet as cs
+
+
+class LegacySet(cs.Set):
+    """Set iterating with a shared cursor as before."""
+
+    def __init__(self, iteratable_data=None):
+        super().__init__(iteratable_data)
+        self.actual_position_of_iterator = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.actual_position_of_iterator < len(self):
+            item = self.item_list[self.actual_position_of_iterator]
+            self.actual_position_of_iterator += 1
+            return item
+        else:
+            self.actual_position_of_iterator = 0
+            raise StopIteration()
+
+
+def iterate(iteratable_data):
+    """Consume all items of the data."""
+    for _ in iteratable_data:
+        pass
+
+
+def items_per_second(iteratable_data, repetitions=10):
+    """Return the best measured number of iterated items per second."""
+    seconds = min(timeit.repeat(
+        lambda: iterate(iteratable_data), number=repetitions, repeat=5))
+    return len(iteratable_data) * repetitions / seconds
+
+
+def count_nested_pairs(iteratable_data):
+    """
+    Count the pairs of two nested loops over the same data.
+
+    A shared cursor makes the outer loop start again after every inner
+    loop, therefore counting stops after more than n^2 pairs.
+    """
+    maximum_pairs = len(iteratable_data) ** 2
+    number_of_pairs = 0
+    for _ in iteratable_data:
+        for _ in iteratable_data:
+            number_of_pairs += 1
+        if number_of_pairs > maximum_pairs:
+            break
+    return number_of_pairs
+
+
+def iterate_concurrently(iteratable_data, number_of_threads=8,
+                         repetitions=20):
+    """
+    Iterate the same data in several threads at the same time.
+
+    Return true if every thread saw all items in order in every repetition.
+    """
+    expected_items = list(cs.Set(iteratable_data).item_list)
+    barrier = threading.Barrier(number_of_threads)
+    results = []
+
+    def read():
+        barrier.wait()
+        for _ in range(repetitions):
+            # read at most one item too many in case the threads keep
+            # resetting a shared cursor
+            items = list(itertools.islice(
+                iter(iteratable_data), len(expected_items) + 1))
+            results.append(items == expected_items)
+
+    # switch threads as often as possible to provoke interference
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=read)
+                   for _ in range(number_of_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    return all(results)
+
+
+def benchmark_iteration(size=10 ** 5, nested_size=300):
+    """
+    Compare the iteration of the current and the previous Set.
+
+    The throughput is measured on sets of the given size, nested loops and
+    concurrent threads on a smaller set.
+    """
+    results = []
+    for name, iteratable_data in (("list", list(range(size))),
+                                  ("Set", cs.Set(range(size))),
+                                  ("LegacySet", LegacySet(range(size)))):
+        nested_data = type(iteratable_data)(range(nested_size))
+        results.append({
+            "benchmark": "iteration",
+            "type": name,
+            "items": size,
+            "items_per_second": items_per_second(iteratable_data),
+            "nested_pairs": count_nested_pairs(nested_data),
+            "expected_nested_pairs": nested_size ** 2,
+            "concurrent_iteration_correct": iterate_concurrently(
+                nested_data)
+        })
+    return results
+
+
+def create_items(size, hashable=True, offset=0):
+    """Return distinct integers or distinct (unhashable) lists."""
+    if hashable:
+        return list(range(offset, offset + size))
+    return [[i, -i] for i in range(offset, offset + size)]
+
+
+def create_overlapping_sets(size, hashable):
+    """Return two sets of the given size sharing half of their items."""
+    return (cs.Set(create_items(size, hashable)),
+            cs.Set(create_items(size, hashable, size // 2)))
+
+
+def select_even(x, y=None):
+    """Selection function keeping the items with even x values."""
+    return x % 2 == 0
+
+
+def contains_all(set_a, items):
+    """Check the membership of all items."""
+    for item in items:
+        item in set_a
+
+
+# functions preparing the arguments of an operation processing about the
+# given number of items and the operations themselves
+SCALING_OPERATIONS = {
+    "construction": (
+        lambda size, hashable: (create_items(size, hashable),),
+        cs.Set),
+    "contains": (
+        lambda size, hashable: (cs.Set(create_items(size, hashable)),
+                                create_items(size, hashable, size // 2)),
+        contains_all),
+    "union": (
+        create_overlapping_sets,
+        cs.union),
+    "intersect": (
+        create_overlapping_sets,
+        cs.intersect),
+    "complement": (
+        create_overlapping_sets,
+        cs.complement),
+    # both factors have sqrt(size) items, so the product has size pairs
+    "cartesianProduct": (
+        lambda size, hashable: (
+            cs.Set(create_items(math.isqrt(size), hashable)),
+            cs.Set(create_items(math.isqrt(size), hashable))),
+        cs.cartesianProduct),
+    "getSpecifiedSubset": (
+        lambda size, hashable: (cs.Set(create_items(size, hashable)),
+                                select_even),
+        cs.getSpecifiedSubset),
+    # the set has log2(size) items, so the power set has size subsets
+    "getPowerSet": (
+        lambda size, hashable: (
+            cs.Set(create_items(max(1, round(math.log2(size))), hashable)),),
+        cs.Set.getPowerSet)
+}
+
+
+def time_operation(operation, arguments, minimum_seconds=0.05):
+    """Return the best time of a single call, repeated for fast calls."""
+    repetitions = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(repetitions):
+            operation(*arguments)
+        seconds = time.perf_counter() - start
+        if seconds >= minimum_seconds or repetitions >= 10 ** 4:
+            break
+        repetitions *= 10
+    return min([seconds] + timeit.repeat(
+        lambda: operation(*arguments), number=repetitions, repeat=2)) \
+        / repetitions
+
+
+def fit_exponent(sizes, seconds, minimum_size=1000):
+    """
+    Return the exponent k of the fitted curve seconds = c * size^k.
+
+    Small sizes are dominated by constant overhead, therefore only sizes
+    of at least minimum_size are fitted if there are two of them.
+    """
+    points = [(size, second) for size, second in zip(sizes, seconds)
+              if size >= minimum_size]
+    if len(points) < 2:
+        points = list(zip(sizes, seconds))
+    if len(points) < 2:
+        return None
+    log_sizes = np.log([size for size, _ in points])
+    log_seconds = np.log([max(second, 1e-12) for _, second in points])
+    return float(np.polyfit(log_sizes, log_seconds, 1)[0])
+
+
+def benchmark_scaling(sizes=(10, 100, 1000, 10 ** 4, 10 ** 5, 10 ** 6),
+                      operations=tuple(SCALING_OPERATIONS),
+                      maximum_exponent=1.3):
+    """
+    Measure how the set operations scale with the number of items.
+
+    Every operation is timed for hashable (integers) and unhashable
+    (lists) items of the given sizes, where size is the number of items
+    processed, i.e. the number of pairs of the cartesian product and the
+    number of subsets of the power set. The fitted exponent is about 1 for
+    linear operations, results above maximum_exponent are marked as
+    failed.
+    """
+    results = []
+    for name in operations:
+        create_arguments, operation = SCALING_OPERATIONS[name]
+        for hashable in (True, False):
+            seconds = []
+            for size in sizes:
+                arguments = create_arguments(size, hashable)
+                seconds.append(time_operation(operation, arguments))
+            exponent = fit_exponent(sizes, seconds)
+            results.append({
+                "benchmark": "scaling",
+                "operation": name,
+                "items": "hashable" if hashable else "unhashable",
+                "sizes": list(sizes),
+                "seconds": seconds,
+                "exponent": exponent,
+                "passed": exponent is None or exponent <= maximum_exponent
+            })
+    return results
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(
+        description="Benchmark the sets and print the results as JSON.")
+    argument_parser.add_argument(
+        "benchmark", choices=["iteration", "scaling"])
+    argument_parser.add_argument(
+        "--size", type=int, default=10 ** 5,
+        help="number of items of the benchmarked sets (iteration)")
+    argument_parser.add_argument(
+        "--sizes", type=int, nargs="+",
+        default=[10, 100, 1000, 10 ** 4, 10 ** 5, 10 ** 6],
+        help="numbers of processed items (scaling)")
+    argument_parser.add_argument(
+        "--operations", nargs="+", choices=list(SCALING_OPERATIONS),
+        default=list(SCALING_OPERATIONS),
+        help="benchmarked operations (scaling)")
+    argument_parser.add_argument(
+        "--maximum-exponent", type=float, default=1.3,
+        help="largest accepted fitted exponent (scaling)")
+    arguments = argument_parser.parse_args()
+    if arguments.benchmark == "iteration":
+        print(json.dumps(benchmark_iteration(arguments.size), indent=4))
+    elif arguments.benchmark == "scaling":
+        results = benchmark_scaling(
+            arguments.sizes, arguments.operations,
+            arguments.maximum_exponent)
+        print(json.dumps(results, indent=4))
+        # a non-zero exit code lets scripts detect regressions
+        if not all(result["passed"] for result in results):
+            sys.exit(1)
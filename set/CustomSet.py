@@ -1,8 +1,11 @@
 """Module to handle different set operations."""
 
 import itertools
+import math
+import threading
 
 import matplotlib.pyplot as plt
+import numpy as np
 
 
 class Set:
@@ -10,19 +13,15 @@ class Set:
 
     def __init__(self, iteratable_data=None):
         """Initialize a set with given data."""
+        # items in insertion order
+        self.item_list = []
+        # hashable keys of all items (see freezeItem) for O(1) lookups
+        self.item_keys = set()
+        # items which can not be frozen are compared one by one
+        self.unhashable_items = []
         if iteratable_data is not None:
-            self.item_list = self.eliminateDuplicates(iteratable_data)
-        else:
-            self.item_list = []
-        self.initIterator()
-
-    def initIterator(self):
-        """
-        Encapsulate the iterator initialization in a separate method.
-
-        Is used to simplify inheritance.
-        """
-        self.actual_position_of_iterator = 0
+            for item in iteratable_data:
+                self.addItem(item)
 
     def __str__(self):
         """Return a string representation of all items within the set."""
@@ -37,25 +36,23 @@ class Set:
         return string_representation
 
     def __iter__(self):
-        """Return the instance object."""
-        return self
-
-    def __next__(self):
-        """Return the next element in the set as long as it exists."""
-        if self.actual_position_of_iterator < len(self):
-            item = self.item_list[self.actual_position_of_iterator]
-            self.actual_position_of_iterator += 1
-            return item
-        else:
-            self.actual_position_of_iterator = 0
-            raise StopIteration()
+        """
+        Return a new iterator over the items.
+
+        Every call returns an independent iterator, so nested loops over
+        the same set and loops in different threads do not interfere.
+        """
+        return iter(self.item_list)
 
     def __contains__(self, element):
         """Return true if the specified item exists in the set."""
-        for item in self.item_list:
-            if item == element:
-                return True
-        return False
+        try:
+            return freezeItem(element) in self.item_keys
+        except TypeError:
+            for item in self.unhashable_items:
+                if item == element:
+                    return True
+            return False
 
     def __len__(self):
         """Return the number of elements in the set."""
@@ -77,6 +74,21 @@ class Set:
         """Use the - operator as a shortcut for the complement function."""
         return complement(self, iteratable_data)
 
+    def addItem(self, item):
+        """Append the item if it is not present yet, return true if so."""
+        try:
+            key = freezeItem(item)
+        except TypeError:
+            if item in self.unhashable_items:
+                return False
+            self.unhashable_items.append(item)
+        else:
+            if key in self.item_keys:
+                return False
+            self.item_keys.add(key)
+        self.item_list.append(item)
+        return True
+
     def getSpecifiedSubset(self, selection_function):
         """Create a subset according to given selection function."""
         return getSpecifiedSubset(self, selection_function)
@@ -96,13 +108,18 @@ class Set:
                 power_set.append(subset_tuple_as_list)
         return Set(power_set)
 
+    def getLazyPowerSet(self):
+        """Return a view of all possible subsets without creating them."""
+        return LazyPowerSet(self)
+
+    def getLazyCartesianProduct(self, iteratable_data,
+                                selection_function=None):
+        """Return a view of all pairs with the data without creating them."""
+        return LazyCartesianProduct(self, iteratable_data, selection_function)
+
     def eliminateDuplicates(self, iteratable_data):
         """Take given data and create a list without duplicates."""
-        items_without_duplicates = []
-        for item in iteratable_data:
-            if item not in items_without_duplicates:
-                items_without_duplicates.append(item)
-        return items_without_duplicates
+        return Set(iteratable_data).item_list
 
 
 class CartesianProduct(Set):
@@ -114,16 +131,38 @@ class CartesianProduct(Set):
             iteratable_data_b=None,
             selection_function=None):
         """Compute the cartesian product and create a corresponding set."""
-        if selection_function is None:
-            super().__init__(
-                cartesianProduct(iteratable_data_a, iteratable_data_b)
-            )
+        # dictionary mapping the key (see freezeItem) of every x value to
+        # all its y values, maintained by addItem
+        self.y_values_of_x = {}
+        # pairs whose x value can not be frozen
+        self.unhashable_pairs = []
+        # x and y values as arrays, created by getCoordinates
+        self.coordinates = None
+        if iteratable_data_a is None or len(iteratable_data_a) < 1 \
+                or iteratable_data_b is None or len(iteratable_data_b) < 1:
+            product = cartesianProduct(iteratable_data_a, iteratable_data_b)
+            if selection_function is not None:
+                product = getSpecifiedSubset(product, selection_function)
+            super().__init__(product)
         else:
-            specified_subset = getSpecifiedSubset(
-                cartesianProduct(iteratable_data_a, iteratable_data_b),
-                selection_function
-            )
-            super().__init__(specified_subset)
+            # add (and filter) the pairs while they are generated instead
+            # of storing the whole product first
+            super().__init__(LazyCartesianProduct(
+                iteratable_data_a, iteratable_data_b, selection_function))
+
+    def addItem(self, item):
+        """Append the item if it is not present yet and update the index."""
+        if not super().addItem(item):
+            return False
+        self.coordinates = None
+        if isinstance(item, (list, tuple)) and len(item) == 2:
+            try:
+                key = freezeItem(item[0])
+            except TypeError:
+                self.unhashable_pairs.append(item)
+            else:
+                self.y_values_of_x.setdefault(key, []).append(item[1])
+        return True
 
     def __call__(self, x):
         """
@@ -131,20 +170,29 @@ class CartesianProduct(Set):
 
         Return the y values of all inner tuples whose x values equal the input.
         """
-        y = []
-        for item in self.item_list:
-            if item[0] == x:
-                y.append(item[1])
-        return y
+        try:
+            return list(self.y_values_of_x.get(freezeItem(x), []))
+        except TypeError:
+            return [item[1] for item in self.unhashable_pairs
+                    if item[0] == x]
 
     def getCoordinates(self):
-        """Return the data's x and y values as different lists."""
-        x_values = []
-        y_values = []
-        for item in self.item_list:
-            x_values.append(item[0])
-            y_values.append(item[1])
-        return x_values, y_values
+        """
+        Return the data's x and y values as different arrays.
+
+        The arrays are cached until the set changes, therefore they are
+        read-only.
+        """
+        if self.coordinates is None:
+            x_values = []
+            y_values = []
+            for item in self.item_list:
+                x_values.append(item[0])
+                y_values.append(item[1])
+            self.coordinates = (toArray(x_values), toArray(y_values))
+            for values in self.coordinates:
+                values.flags.writeable = False
+        return self.coordinates
 
     def plot(self):
         """Plot the encapsulated data."""
@@ -153,8 +201,361 @@ class CartesianProduct(Set):
         plt.show()
 
 
+class NumericSet(Set):
+    """
+    Class representing a set of numbers as sorted NumPy array.
+
+    Set operations between numeric sets, membership tests and subsets are
+    computed vectorized on the array instead of item by item.
+    """
+
+    def __init__(self, iteratable_data=None, dtype=None):
+        """Initialize a numeric set with given numbers."""
+        if iteratable_data is None:
+            iteratable_data = []
+        elif not isinstance(iteratable_data, np.ndarray):
+            iteratable_data = list(iteratable_data)
+        self.values = sortedUnique(np.asarray(iteratable_data, dtype=dtype))
+        if self.values.dtype.kind not in "biuf":
+            raise TypeError("A numeric set can only contain numbers.")
+        # items as Python list, created on demand (see item_list)
+        self.cached_item_list = None
+
+    @classmethod
+    def fromSortedArray(cls, values):
+        """Create a numeric set out of sorted numbers without duplicates."""
+        numeric_set = cls.__new__(cls)
+        numeric_set.values = values
+        numeric_set.cached_item_list = None
+        return numeric_set
+
+    @property
+    def item_list(self):
+        """Return all numbers as list in ascending order."""
+        if self.cached_item_list is None:
+            self.cached_item_list = self.values.tolist()
+        return self.cached_item_list
+
+    def __contains__(self, element):
+        """Return true if the specified number exists in the set."""
+        if not isinstance(element, (int, float, np.number)):
+            return False
+        return bool(self.contains(element))
+
+    def __len__(self):
+        """Return the number of elements in the set."""
+        return self.values.size
+
+    def __getitem__(self, index):
+        """Access to item via index."""
+        return self.item_list[index]
+
+    def contains(self, queries):
+        """Return a boolean array telling which queries are in the set."""
+        queries = np.asarray(queries)
+        positions = np.searchsorted(self.values, queries)
+        # queries greater than all numbers would be inserted at the end
+        positions = np.minimum(positions, max(self.values.size - 1, 0))
+        if self.values.size == 0:
+            return np.zeros(queries.shape, dtype=bool)
+        return self.values[positions] == queries
+
+    def addItem(self, item):
+        """Insert the number if it is not present yet, return true if so."""
+        item_array = np.asarray(item)
+        if item_array.ndim != 0 or item_array.dtype.kind not in "biuf":
+            raise TypeError("A numeric set can only contain numbers.")
+        if item in self:
+            return False
+        values = self.values.astype(np.result_type(self.values, item))
+        self.values = np.insert(
+            values, np.searchsorted(values, item), item)
+        self.cached_item_list = None
+        return True
+
+    def getSpecifiedSubset(self, selection_function):
+        """
+        Create a subset according to given selection function.
+
+        The function is called once with the array of all numbers if it
+        returns an array of booleans for it, otherwise for every number.
+        """
+        try:
+            mask = np.asarray(selection_function(self.values))
+        except (TypeError, ValueError):
+            # e.g. the function uses an if statement on its argument
+            mask = None
+        if mask is None or mask.dtype != bool \
+                or mask.shape != self.values.shape:
+            mask = np.array(
+                [bool(selection_function(item)) for item in self.item_list],
+                dtype=bool)
+        return NumericSet.fromSortedArray(self.values[mask])
+
+
+class Ordinal(Set):
+    """
+    Class representing the von Neumann ordinal of a natural number.
+
+    The ordinal n is the set of the ordinals 0, ..., n-1. All ordinals are
+    created only once (see vonNeumannOrdinalConstruction) and share a
+    single list of their items, ordinal n uses its first n entries. Thus
+    ordinal n+1 reuses ordinal n instead of copying it and ordinals are
+    immutable.
+    """
+
+    def __init__(self, number, ordinal_list):
+        """Create the ordinal of the number out of the shared list."""
+        self.number = number
+        self.ordinal_list = ordinal_list
+
+    @property
+    def item_list(self):
+        """Return the ordinals 0, ..., n-1 as new list."""
+        return self.ordinal_list[:self.number]
+
+    def __iter__(self):
+        """Return a new iterator over the ordinals 0, ..., n-1."""
+        return itertools.islice(self.ordinal_list, self.number)
+
+    def __contains__(self, element):
+        """Return true if the element is a smaller ordinal."""
+        return isinstance(element, Ordinal) \
+            and element.ordinal_list is self.ordinal_list \
+            and element.number < self.number
+
+    def __len__(self):
+        """Return the number of elements, i.e. the number itself."""
+        return self.number
+
+    def __getitem__(self, index):
+        """Access to item via index."""
+        if isinstance(index, slice):
+            return self.item_list[index]
+        if index < 0:
+            index += self.number
+        if not 0 <= index < self.number:
+            raise IndexError("Index out of range.")
+        return self.ordinal_list[index]
+
+    def addItem(self, item):
+        """Ordinals are shared, therefore they can not be changed."""
+        raise TypeError("Ordinals can not be changed.")
+
+
+# all ordinals created so far, the n-th entry is the ordinal n
+VON_NEUMANN_ORDINALS = []
+VON_NEUMANN_ORDINALS_LOCK = threading.Lock()
+
+
+class LazyPowerSet:
+    """
+    Class representing the power set without storing its subsets.
+
+    Every subset corresponds to a bitmask, bit i is set if the i-th item
+    of the underlying set is contained. Subsets are created as lists on the
+    fly while iterating.
+    """
+
+    def __init__(self, iteratable_data):
+        """Create the power set view of the given data."""
+        self.base_set = toSet(iteratable_data)
+
+    def __str__(self):
+        """Return a string representation of all subsets."""
+        return "{" + ", ".join(str(subset) for subset in self) + "}"
+
+    def __len__(self):
+        """
+        Return the number of subsets 2^n.
+
+        Python limits len() to sys.maxsize, use numberOfSubsets for sets
+        of 63 or more items.
+        """
+        return self.numberOfSubsets()
+
+    def numberOfSubsets(self):
+        """Return the number of subsets 2^n."""
+        return 2 ** len(self.base_set)
+
+    def __iter__(self):
+        """Yield all subsets in Gray code order."""
+        for bitmask in self.bitmasks():
+            yield self.subsetOfBitmask(bitmask)
+
+    def __contains__(self, subset):
+        """Return true if all items of the subset are in the set."""
+        try:
+            subset = Set(subset)
+        except TypeError:
+            return False
+        for item in subset:
+            if item not in self.base_set:
+                return False
+        return True
+
+    def bitmasks(self):
+        """
+        Yield the bitmasks of all subsets in Gray code order.
+
+        Successive bitmasks differ in a single bit, i.e. every subset
+        differs from the previous one by a single item.
+        """
+        for index in range(self.numberOfSubsets()):
+            yield index ^ (index >> 1)
+
+    def subsetOfBitmask(self, bitmask):
+        """Return the subset of the given bitmask as list."""
+        subset = []
+        index = 0
+        while bitmask:
+            if bitmask & 1:
+                subset.append(self.base_set[index])
+            bitmask >>= 1
+            index += 1
+        return subset
+
+    def subsetsOfSize(self, size):
+        """Yield all subsets with the given number of items."""
+        for subset_tuple in itertools.combinations(
+                self.base_set.item_list, size):
+            yield list(subset_tuple)
+
+    def countSubsetsOfSize(self, size):
+        """Return the number of subsets with the given number of items."""
+        if size < 0 or size > len(self.base_set):
+            return 0
+        return math.comb(len(self.base_set), size)
+
+
+def freezeItem(item):
+    """
+    Return a hashable key of the item.
+
+    Equal items have equal keys. Lists, tuples, dictionaries and sets are
+    frozen recursively, their type is part of the key because e.g. [1, 2]
+    does not equal (1, 2). Raise a TypeError if the item can not be frozen.
+    """
+    try:
+        hash(item)
+        return item
+    except TypeError:
+        pass
+    if isinstance(item, (list, tuple)):
+        return (type(item), tuple(freezeItem(element) for element in item))
+    if isinstance(item, dict):
+        return (dict, frozenset(
+            (key, freezeItem(value)) for key, value in item.items()))
+    if isinstance(item, set):
+        return frozenset(item)
+    raise TypeError("The item " + str(item) + " can not be frozen.")
+
+
+def toArray(values):
+    """Return a one dimensional array of numbers or of the original objects."""
+    try:
+        array = np.array(values)
+    except ValueError:
+        array = None
+    if array is None or array.ndim != 1 or array.dtype.kind not in "biufc":
+        # the values are sequences themselves or not all numbers, which
+        # NumPy would e.g. convert to strings
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+    return array
+
+
+def sortedUnique(values):
+    """Return the sorted numbers of the array without duplicates."""
+    values = np.sort(np.ravel(values), kind="stable")
+    if values.size == 0:
+        return values
+    is_first = np.empty(values.size, dtype=bool)
+    is_first[0] = True
+    np.not_equal(values[1:], values[:-1], out=is_first[1:])
+    return values[is_first]
+
+
+def toSet(iteratable_data):
+    """Return the data as set to allow O(1) lookups."""
+    if isinstance(iteratable_data, Set):
+        return iteratable_data
+    return Set(iteratable_data)
+
+
+class LazyCartesianProduct:
+    """
+    Class representing the cartesian product without storing its pairs.
+
+    Only the two factors are stored as sets, the pairs [a, b] are created
+    on the fly while iterating, so the memory is proportional to the
+    inputs instead of their product.
+    """
+
+    def __init__(
+            self,
+            iteratable_data_a,
+            iteratable_data_b,
+            selection_function=None):
+        """Create a view of the pairs for which selection_function holds."""
+        self.set_a = toSet(iteratable_data_a)
+        self.set_b = toSet(iteratable_data_b)
+        self.selection_function = selection_function
+        # number of selected pairs, computed on the first call of len()
+        self.number_of_selected_pairs = None
+
+    def __str__(self):
+        """Return a string representation of all pairs."""
+        return "{" + ", ".join(str(pair) for pair in self) + "}"
+
+    def __iter__(self):
+        """Yield all (selected) pairs in order."""
+        for item_a in self.set_a.item_list:
+            for item_b in self.set_b.item_list:
+                if self.selection_function is None \
+                        or self.selection_function(item_a, item_b):
+                    yield [item_a, item_b]
+
+    def __contains__(self, pair):
+        """Return true if the pair consists of items of both factors."""
+        try:
+            item_a, item_b = pair
+        except (TypeError, ValueError):
+            return False
+        if item_a not in self.set_a or item_b not in self.set_b:
+            return False
+        return self.selection_function is None \
+            or bool(self.selection_function(item_a, item_b))
+
+    def __len__(self):
+        """Return the number of (selected) pairs."""
+        if self.selection_function is None:
+            return len(self.set_a) * len(self.set_b)
+        if self.number_of_selected_pairs is None:
+            # the selected pairs have to be counted once
+            self.number_of_selected_pairs = sum(1 for _ in self)
+        return self.number_of_selected_pairs
+
+    def __getitem__(self, index):
+        """Access to a pair via index, only without selection function."""
+        if self.selection_function is not None:
+            raise TypeError(
+                "Filtered products do not support access via index.")
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Index out of range.")
+        index_a, index_b = divmod(index, len(self.set_b))
+        return [self.set_a[index_a], self.set_b[index_b]]
+
+
 def union(iteratable_data_a, iteratable_data_b):
     """Return the union of iteratable data A and B as a set."""
+    if isinstance(iteratable_data_a, NumericSet) \
+            and isinstance(iteratable_data_b, NumericSet):
+        # the stable sort merges the two sorted runs in linear time
+        return NumericSet.fromSortedArray(sortedUnique(np.concatenate((
+            iteratable_data_a.values, iteratable_data_b.values))))
     # check if one of the inputs is a None object or an empty list
     if iteratable_data_a is None or len(iteratable_data_a) < 1:
         if iteratable_data_b is None or len(iteratable_data_b) < 1:
@@ -166,37 +567,46 @@ def union(iteratable_data_a, iteratable_data_b):
             return Set(iteratable_data_a)
         else:
             # both inputs are correct, therefore compute the union operation
-            # as usual
-            union_items = []
-            # all items of dataset A have to be present in the union set
-            for item in iteratable_data_a:
-                union_items.append(item)
-            # insert an element of B only if it is not already present
+            # as usual: all items of dataset A have to be present in the
+            # union set, an element of B is only inserted if it is not
+            # already present
+            union_set = Set(iteratable_data_a)
             for item in iteratable_data_b:
-                if item not in iteratable_data_a:
-                    union_items.append(item)
-            union_set = Set(union_items)
+                union_set.addItem(item)
             return union_set
 
 
 def intersect(iteratable_data_a, iteratable_data_b):
     """Return the intersection of iteratable data A and B as a set."""
+    if isinstance(iteratable_data_a, NumericSet) \
+            and isinstance(iteratable_data_b, NumericSet):
+        return NumericSet.fromSortedArray(np.intersect1d(
+            iteratable_data_a.values, iteratable_data_b.values,
+            assume_unique=True))
     # return immediately if input A or B is invalid
     if iteratable_data_a is None or len(iteratable_data_a) < 1:
         return Set([])
     if iteratable_data_b is None or len(iteratable_data_b) < 1:
         return Set([])
     # computation as usual because both inputs are valid
-    intersect_items = []
+    set_b = toSet(iteratable_data_b)
+    intersect_set = Set()
     for item in iteratable_data_a:
-        if item in iteratable_data_b:
-            intersect_items.append(item)
-    intersect_set = Set(intersect_items)
+        if item in set_b:
+            intersect_set.addItem(item)
     return intersect_set
 
 
 def complement(iteratable_data_a, iteratable_data_b=None):
     """Return the complement of iteratable data A and B as a set."""
+    if isinstance(iteratable_data_a, NumericSet) and (
+            iteratable_data_b is None
+            or isinstance(iteratable_data_b, NumericSet)):
+        if iteratable_data_b is None:
+            return NumericSet.fromSortedArray(iteratable_data_a.values)
+        return NumericSet.fromSortedArray(np.setdiff1d(
+            iteratable_data_a.values, iteratable_data_b.values,
+            assume_unique=True))
     # return immediately if input A is invalid
     if iteratable_data_a is None or len(iteratable_data_a) < 1:
         return Set([])
@@ -205,11 +615,11 @@ def complement(iteratable_data_a, iteratable_data_b=None):
         return Set(iteratable_data_a)
     else:
         # both inputs are correct, therefore compute the complement as usual
-        complement_items = []
+        set_b = toSet(iteratable_data_b)
+        complement_set = Set()
         for item in iteratable_data_a:
-            if item not in iteratable_data_b:
-                complement_items.append(item)
-        complement_set = Set(complement_items)
+            if item not in set_b:
+                complement_set.addItem(item)
         return complement_set
 
 
@@ -225,13 +635,10 @@ def cartesianProduct(iteratable_data_a, iteratable_data_b):
         if iteratable_data_b is None or len(iteratable_data_b) < 1:
             return Set(iteratable_data_a)
         else:
-            # both inputs are correct, therefore compute the cartesian product
-            # as usual
-            cartesian_product = []
-            for item_a in iteratable_data_a:
-                for item_b in iteratable_data_b:
-                    cartesian_product.append([item_a, item_b])
-            return Set(cartesian_product)
+            # both inputs are correct, therefore add the pairs of the
+            # product while they are generated
+            return Set(LazyCartesianProduct(
+                iteratable_data_a, iteratable_data_b))
 
 
 def getSpecifiedSubset(iteratable_data, selection_function):
@@ -252,23 +659,21 @@ def getSpecifiedSubset(iteratable_data, selection_function):
 
 
 def vonNeumannOrdinalConstruction(n):
-    """Use von Neumann's method to represent natural numbers."""
-    if n == 0:
-        return Set([])
-    elif n == 1:
-        return Set([[]])
-    else:
-        return union(
-            Set(vonNeumannOrdinalConstruction(n - 1)),
-            Set([vonNeumannOrdinalConstruction(n - 1)])
-        )
+    """
+    Use von Neumann's method to represent natural numbers.
+
+    The ordinal n+1 is the union of n and {n}. The ordinals are memoized,
+    so constructing all ordinals up to n costs O(n) time and memory.
+    """
+    if n < 0:
+        raise ValueError("Only natural numbers have ordinals.")
+    with VON_NEUMANN_ORDINALS_LOCK:
+        while len(VON_NEUMANN_ORDINALS) <= n:
+            VON_NEUMANN_ORDINALS.append(Ordinal(
+                len(VON_NEUMANN_ORDINALS), VON_NEUMANN_ORDINALS))
+    return VON_NEUMANN_ORDINALS[n]
 
 
 def binomialCoefficient(n, k):
     """Compute binomial coefficients using power sets."""
-    dummy_power_set = Set(range(n)).getPowerSet()
-    number_of_subsets_with_length_k = 0
-    for subset in dummy_power_set:
-        if len(subset) == k:
-            number_of_subsets_with_length_k += 1
-    return number_of_subsets_with_length_k
+    return LazyPowerSet(range(n)).countSubsetsOfSize(k)
@@ -33,8 +33,8 @@ if __name__ == "__main__":
     list2 = np.arange(0, 2)
     list3 = [function(x) for x in list2]
     set1 = cs.Set(list1)
-    set2 = cs.Set(list2)
-    set3 = cs.Set(list3)
+    set2 = cs.NumericSet(list2)
+    set3 = cs.NumericSet(list3)
 
     s = set2.getSpecifiedSubset(deltaFunction)
 
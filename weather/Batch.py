@@ -0,0 +1,143 @@
+"""Module to analyze many station files in parallel."""
+import argparse
+import functools
+import multiprocessing
+
+import numpy as np
+
+import Derivation
+import ReadData
+import Regression
+
+# range of dates used if no dates are given
+FIRST_DATE = 0
+LAST_DATE = 99999999
+
+
+def regressionAnalysis(x_axis, temperature, rainfall):
+    """Return the coefficients of the linear regression of both series."""
+    slope_temperature, offset_temperature = Regression.linearRegression(
+        x_axis, temperature)
+    slope_rainfall, offset_rainfall = Regression.linearRegression(
+        x_axis, rainfall)
+    return (slope_temperature, offset_temperature,
+            slope_rainfall, offset_rainfall)
+
+
+def averageAnalysis(x_axis, temperature, rainfall):
+    """Return average, minimum and maximum of both series."""
+    return (np.average(temperature), np.min(temperature),
+            np.max(temperature), np.average(rainfall), np.min(rainfall),
+            np.max(rainfall))
+
+
+def derivativeAnalysis(x_axis, temperature, rainfall, interval_width=5):
+    """Return the average derivative and extreme points of the temperature."""
+    _, derivative = Derivation.approximateDerivation(
+        x_axis, temperature, interval_width, True)
+    max_x_values, _, min_x_values, _ = Derivation.computeExtremePoints(
+        x_axis, temperature, derivative, interval_width)
+    average_derivative = np.average(derivative) if derivative else np.nan
+    return (average_derivative, len(max_x_values), len(min_x_values))
+
+
+# names of the results and function of every analysis, the function takes
+# the x axis, temperature and rainfall and returns a tuple of numbers
+ANALYSES = {
+    "regression": (
+        ("temperature_slope", "temperature_offset",
+         "rainfall_slope", "rainfall_offset"),
+        regressionAnalysis),
+    "average": (
+        ("temperature_average", "temperature_minimum", "temperature_maximum",
+         "rainfall_average", "rainfall_minimum", "rainfall_maximum"),
+        averageAnalysis),
+    "derivative": (
+        ("temperature_derivative", "maxima", "minima"),
+        derivativeAnalysis)
+}
+
+
+def analyzeStation(fileName, analysis="regression", from_date=FIRST_DATE,
+                   to_date=LAST_DATE):
+    """
+    Load a station file and analyze its temperature and rainfall.
+
+    Return the station ID (STAT column) and the results of the analysis.
+    """
+    station, temperature, rainfall = ReadData.getDataByDate(
+        fileName, from_date, to_date, ("STAT", "TX", "RR"))
+    if len(station) == 0:
+        raise ValueError(fileName + " contains no data in the given period.")
+    x_axis = np.arange(len(temperature))
+    _, function = ANALYSES[analysis]
+    return int(station[0]), function(x_axis, temperature, rainfall)
+
+
+def analyzeStations(fileNames, analysis="regression", from_date=FIRST_DATE,
+                    to_date=LAST_DATE, workers=None):
+    """
+    Analyze all station files, each of them in a worker process.
+
+    The pairs of station ID and results are returned as generator in the
+    order in which the stations are completed.
+
+    workers:    number of worker processes, defaults to the number of
+                CPUs, 1 analyzes all stations in the calling process
+    """
+    if analysis not in ANALYSES:
+        raise ValueError("Unknown analysis " + str(analysis) + ".")
+    function = functools.partial(
+        analyzeStation, analysis=analysis, from_date=from_date,
+        to_date=to_date)
+    if workers == 1:
+        for fileName in fileNames:
+            yield function(fileName)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(function, fileNames):
+            yield result
+
+
+def combineResults(results, analysis="regression"):
+    """
+    Combine the results of analyzeStations into one structured array.
+
+    The array has the field STAT and one field per result of the analysis
+    and is sorted by the station ID.
+    """
+    names, _ = ANALYSES[analysis]
+    dtype = [("STAT", np.int64)] + [(name, np.float64) for name in names]
+    table = np.array([(station,) + tuple(values)
+                      for station, values in results], dtype=dtype)
+    return np.sort(table, order="STAT")
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(
+        description="Analyze many station files in parallel.")
+    argument_parser.add_argument("analysis", choices=list(ANALYSES))
+    argument_parser.add_argument("files", nargs="+")
+    argument_parser.add_argument(
+        "--from", dest="from_date", type=int, default=FIRST_DATE,
+        help="first day as JJJJMMDD")
+    argument_parser.add_argument(
+        "--to", dest="to_date", type=int, default=LAST_DATE,
+        help="last day as JJJJMMDD")
+    argument_parser.add_argument(
+        "--workers", type=int, default=None,
+        help="number of worker processes")
+    arguments = argument_parser.parse_args()
+
+    results = []
+    for station, values in analyzeStations(
+            arguments.files, arguments.analysis, arguments.from_date,
+            arguments.to_date, arguments.workers):
+        # print every station as soon as it is completed
+        print(station, *values)
+        results.append((station, values))
+    table = combineResults(results, arguments.analysis)
+    print(" ".join(table.dtype.names))
+    for row in table:
+        print(*row)
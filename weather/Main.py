@@ -34,8 +34,7 @@ def plotGraphs(temperature, rainfall, start, end):
 
 
 if __name__ == "__main__":
-    start = 0
-    end = 500
-    # TODO: make sure that start as well as end values are valid
-    (temperature, rainfall) = ReadData.getData(start, end)
-    plotGraphs(temperature, rainfall, start, end)
+    # days of the year 2016 in ascending order
+    (temperature, rainfall) = ReadData.getDataByDate(
+        "data/mannheim.txt", 20160101, 20161231, ("TX", "RR"))
+    plotGraphs(temperature, rainfall, 0, len(temperature))
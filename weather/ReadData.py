@@ -1,6 +1,25 @@
 """Module to read the data file."""
+import datetime
+import hashlib
+import itertools
+import json
+import os
+
 import numpy as np
 
+# names of the columns of the DWD station files
+COLUMN_NAMES = ("STAT", "JJJJMMDD", "QN", "TG", "TN", "TM", "TX", "RFM",
+                "FM", "FX", "SO", "NM", "RR", "PM")
+# number of header lines preceding the data
+HEADER_LINES = 3
+# default number of rows per block of readBlocks
+BLOCK_SIZE = 4096
+# version of the layout of the binary cache, see convertToCache
+CACHE_VERSION = 1
+# dictionary mapping every station file to the hash of its content and its
+# date index, see dateIndex
+DATE_INDICES = {}
+
 
 def loadData(fileName):
     """Create matrix representation of given textfile."""
@@ -12,15 +31,233 @@ def getDataSegment(data, column, start, end):
     return data[start:end, column]
 
 
-def getData(start, end):
+def columnIndex(column):
+    """Return the index of a column given by its name or index."""
+    if isinstance(column, str):
+        return COLUMN_NAMES.index(column)
+    return column
+
+
+def dataLines(file):
+    """Yield the lines of the file except header, comments and empty lines."""
+    for line in itertools.islice(file, HEADER_LINES, None):
+        stripped_line = line.lstrip()
+        if stripped_line and not stripped_line.startswith("#"):
+            yield line
+
+
+def parseBlock(lines, column_indices):
+    """
+    Parse whitespace separated lines and return the requested columns.
+
+    The lines of a block are passed at once to the C tokenizer of NumPy
+    (NumPy 1.23 or newer), which converts only the requested columns.
+    """
+    values = np.loadtxt(lines, comments="#", usecols=column_indices,
+                        ndmin=2)
+    return tuple(values[:, index] for index in range(len(column_indices)))
+
+
+def readBlocks(fileName, columns=("TX", "RR"), start=0, end=None,
+               block_size=BLOCK_SIZE):
+    """
+    Yield the requested columns of the rows start to end in blocks.
+
+    columns:    names (see COLUMN_NAMES) or indices of the columns
+    block_size: number of rows per block, the last block may be smaller
+
+    Every block is a tuple of arrays, one per column. The file is read
+    lazily and closed as soon as the row end is reached.
+    """
+    column_indices = [columnIndex(column) for column in columns]
+    with open(fileName) as file:
+        lines = itertools.islice(dataLines(file), start, end)
+        while True:
+            block_lines = list(itertools.islice(lines, block_size))
+            if not block_lines:
+                return
+            yield parseBlock(block_lines, column_indices)
+
+
+def readColumns(fileName, columns=("TX", "RR"), start=0, end=None):
+    """Return the requested columns of the rows start to end as arrays."""
+    blocks = list(readBlocks(fileName, columns, start, end))
+    if not blocks:
+        return tuple(np.empty(0) for _ in columns)
+    return tuple(np.concatenate([block[index] for block in blocks])
+                 for index in range(len(columns)))
+
+
+def cacheDirectory(fileName):
+    """Return the directory of the binary cache of a station file."""
+    directory, name = os.path.split(fileName)
+    return os.path.join(directory, ".cache", name)
+
+
+def fileHash(fileName):
+    """Return the SHA-256 hash of the file's content."""
+    file_hash = hashlib.sha256()
+    with open(fileName, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def readMetadata(fileName):
+    """Return the metadata of the cache or None if there is none."""
+    try:
+        with open(os.path.join(cacheDirectory(fileName),
+                               "metadata.json")) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def writeMetadata(fileName, metadata):
+    """Write the metadata, which marks the cache as complete."""
+    path = os.path.join(cacheDirectory(fileName), "metadata.json")
+    with open(path + ".tmp", "w") as file:
+        json.dump(metadata, file, indent=4)
+    os.replace(path + ".tmp", path)
+
+
+def convertToCache(fileName):
+    """
+    Write every column of the station file to a separate .npy file.
+
+    The metadata (metadata.json) stores the columns, the number of rows and
+    the modification time, size and hash of the source file. It is written
+    last, so an interrupted conversion leaves no valid cache.
+    """
+    status = os.stat(fileName)
+    columns = readColumns(fileName, COLUMN_NAMES)
+    directory = cacheDirectory(fileName)
+    os.makedirs(directory, exist_ok=True)
+    for name, values in zip(COLUMN_NAMES, columns):
+        # replace the file instead of overwriting it, so arrays mapped from
+        # the previous file keep their data
+        path = os.path.join(directory, name + ".npy")
+        with open(path + ".tmp", "wb") as file:
+            np.save(file, values)
+        os.replace(path + ".tmp", path)
+    metadata = {
+        "version": CACHE_VERSION,
+        "columns": list(COLUMN_NAMES),
+        "rows": len(columns[0]),
+        "mtime_ns": status.st_mtime_ns,
+        "size": status.st_size,
+        "sha256": fileHash(fileName)
+    }
+    writeMetadata(fileName, metadata)
+    return metadata
+
+
+def isCacheValid(fileName):
+    """
+    Return true if the cache represents the current station file.
+
+    If modification time or size changed, the hash of the file decides;
+    for an unchanged hash the new modification time is stored, so the
+    file is not hashed again.
+    """
+    metadata = readMetadata(fileName)
+    if metadata is None or metadata.get("version") != CACHE_VERSION:
+        return False
+    status = os.stat(fileName)
+    if metadata["mtime_ns"] == status.st_mtime_ns \
+            and metadata["size"] == status.st_size:
+        return True
+    if metadata["size"] != status.st_size \
+            or metadata["sha256"] != fileHash(fileName):
+        return False
+    metadata["mtime_ns"] = status.st_mtime_ns
+    writeMetadata(fileName, metadata)
+    return True
+
+
+def loadColumns(fileName, columns=("TX", "RR")):
+    """
+    Return the requested columns of all rows as memory-mapped arrays.
+
+    The station file is converted to the binary cache first if there is no
+    valid cache. Slicing the arrays reads only the needed parts of the
+    cached files without copying them. If the cache can not be written,
+    the columns are parsed from the station file instead.
+    """
+    try:
+        if not isCacheValid(fileName):
+            convertToCache(fileName)
+    except OSError:
+        return readColumns(fileName, columns)
+    directory = cacheDirectory(fileName)
+    return tuple(
+        np.load(os.path.join(directory, COLUMN_NAMES[columnIndex(column)]
+                             + ".npy"), mmap_mode="r")
+        for column in columns)
+
+
+def getData(start, end, fileName="data/mannheim.txt"):
     """Return data concerning temperature and rainfall in the given period."""
-    # loads all data from given file
-    data = loadData("data/mannheim.txt")
-    # column index for temperature
-    TX = 6
-    # column index for rainfall
-    RR = 12
-    # chooses and returns the relevant parts of the data
-    temperature = getDataSegment(data, TX, start, end)
-    rainfall = getDataSegment(data, RR, start, end)
-    return (temperature, rainfall)
+    # maps temperature (TX) and rainfall (RR) from the binary cache of the
+    # given file and chooses the relevant rows
+    temperature, rainfall = loadColumns(fileName, ("TX", "RR"))
+    return (temperature[start:end], rainfall[start:end])
+
+
+def dateNumber(date):
+    """Return the date as number JJJJMMDD, e.g. 20170510."""
+    if isinstance(date, datetime.date):
+        return date.year * 10000 + date.month * 100 + date.day
+    return int(date)
+
+
+def dateIndex(fileName):
+    """
+    Return the dates of the station file in ascending order.
+
+    The second return value tells if the rows of the file are sorted
+    descending (newest first, as in the DWD files). The index is built once
+    per station file and rebuilt only if the file changed.
+    """
+    dates, = loadColumns(fileName, ("JJJJMMDD",))
+    metadata = readMetadata(fileName)
+    file_hash = metadata["sha256"] if metadata is not None else None
+    if file_hash is not None and fileName in DATE_INDICES \
+            and DATE_INDICES[fileName][0] == file_hash:
+        return DATE_INDICES[fileName][1]
+    is_descending = len(dates) > 1 and dates[0] > dates[-1]
+    if is_descending:
+        ascending_dates = np.ascontiguousarray(dates[::-1])
+    else:
+        ascending_dates = np.asarray(dates)
+    if np.any(ascending_dates[1:] < ascending_dates[:-1]):
+        raise ValueError("The rows of " + fileName + " are not sorted.")
+    date_index = (ascending_dates, is_descending)
+    if file_hash is not None:
+        DATE_INDICES[fileName] = (file_hash, date_index)
+    return date_index
+
+
+def getDataByDate(station, from_date, to_date, columns=("TX", "RR")):
+    """
+    Return the columns of all days from from_date to to_date (inclusive).
+
+    station:    path of the station file
+    from_date:  first day as number JJJJMMDD or datetime.date
+    to_date:    last day as number JJJJMMDD or datetime.date
+
+    The rows are found by binary search in the date index. Every column is
+    returned as view in ascending time order, no data is copied.
+    """
+    ascending_dates, is_descending = dateIndex(station)
+    number_of_rows = len(ascending_dates)
+    first = np.searchsorted(ascending_dates, dateNumber(from_date), "left")
+    last = np.searchsorted(ascending_dates, dateNumber(to_date), "right")
+    last = max(first, last)
+    values = loadColumns(station, columns)
+    if is_descending:
+        # the ascending positions first to last correspond to the rows
+        # n-last to n-first of the file
+        return tuple(column[number_of_rows - last:number_of_rows - first]
+                     [::-1] for column in values)
+    return tuple(column[first:last] for column in values)